@@ -1,24 +1,66 @@
+"""
+Builds the Pinecone index behind /pinecone/query from the PDFs in documents/.
+
+    python RAG/setup.py            # embed and upsert new or changed chunks, delete removed ones
+    python RAG/setup.py --reset    # clear the namespace and the manifest, then rebuild
+    python RAG/setup.py --workers 8 --embed-concurrency 8 --upsert-concurrency 4
+    python RAG/setup.py --backend local [--int8]   # write the local index instead
+
+With --backend local (the default when VECTOR_BACKEND=local) the vectors are
+written to a memory-mapped index in VECTOR_INDEX_DIR for services/vector_index.py
+to search in-process, reusing vectors from the previous local build. An HNSW
+graph is added when hnswlib is installed and the corpus is large enough.
+
+Either way, a BM25 keyword index over every chunk is rebuilt in
+LEXICAL_INDEX_DIR for hybrid retrieval (services/lexical_index.py).
+
+PDFs are streamed through a generator pipeline (page -> chunk -> embedding
+batch -> upsert batch). Page ranges are extracted on a process pool, and
+embedding and upsert batches run on thread pools, each stage submitting at
+most a few tasks ahead of the next. That keeps memory flat, lets upserts
+overlap embedding, and makes rebuild time scale with cores and allowed API
+concurrency. Rate-limited or failed API calls are retried with backoff.
+
+For Pinecone, every chunk's ID is a hash of its source and text, and every upsert or delete
+is appended to a local manifest as soon as Pinecone accepts it. A re-run only
+embeds chunks the manifest doesn't have yet and deletes the ones that no
+longer exist, so an interrupted run picks up where it stopped. Indexes built
+before the manifest existed hold random IDs; sync those once with --reset.
+"""
+import argparse
+import hashlib
+import json
+import math
 import os
+import random
+import re
+import shutil
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby, islice
 import fitz
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from uuid import uuid4
 from dotenv import load_dotenv
 from tqdm import tqdm
 from pinecone import Pinecone
 
-load_dotenv()
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
 
-def load_pdf(path):
-    doc = fitz.open(path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+load_dotenv()
 
 # Always resolve the full documents path
 DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), "documents")
-print("Reading from:", DOCUMENTS_DIR)
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), ".cache", "manifest.jsonl")
+# Must match Config.VECTOR_INDEX_DIR
+LOCAL_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(os.path.dirname(__file__), ".cache", "index"))
+# Must match Config.LEXICAL_INDEX_DIR
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", os.path.join(os.path.dirname(__file__), ".cache", "lexical"))
 
 # Use os.path.join to build file paths properly
 pdf_paths = [
@@ -29,74 +71,610 @@ pdf_paths = [
     (os.path.join(DOCUMENTS_DIR, "williams_nutrition.pdf"), "Williams Nutrition for Health and Sport", "nutrition")
 ]
 
-# Load PDFs
-documents = []
-print("Loading Documents...")
-for path, source, category in pdf_paths:
-    full_text = load_pdf(path)
-    documents.append({
-        "text": full_text,
-        "source": source,
-        "category": category
-    })
-print("Loaded Documents")
-
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-
-chunks = []
-print("Loading Chunks..")
-for doc in documents:
-    text_chunks = splitter.split_text(doc["text"])
-    for chunk in text_chunks:
-        chunks.append({
-            "text": chunk,
-            "source": doc["source"],
-            "category": doc["category"]
-        })
-
-print("Loaded Chunks, Total Chunks:", len(chunks))
-
-embedder = OpenAIEmbeddings(model="text-embedding-3-small")  # or your preferred model
-
-BATCH_SIZE = 32
-
-print("Batch embedding chunks...")
-embeddings = []
-
-for i in tqdm(range(0, len(chunks), BATCH_SIZE), desc="Embedding"):
-    batch_texts = [chunk["text"] for chunk in chunks[i:i + BATCH_SIZE]]
-    batch_embeddings = embedder.embed_documents(batch_texts)
-    embeddings.extend(batch_embeddings)
-
-# Combine the embeddings back with their metadata to create Pinecone vectors
-vectors = []
-for chunk, embedding in zip(chunks, embeddings):
-    vectors.append({
-        "id": str(uuid4()),
-        "values": embedding,
-        "metadata": {
-            "text": chunk["text"],
-            "source": chunk["source"],
-            "category": chunk["category"]
-        }
-    })
-
-print("Embedding complete. Total vectors:", len(vectors))
-
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
-pinecone_index = os.getenv("PINECONE_INDEX")
-namespace = "gymbro-data"
-
-# Initialize Pinecone client
-pc = Pinecone(api_key=pinecone_api_key)
-index = pc.Index(host=pinecone_index)
-
-# Upload vectors in batches
-BATCH_SIZE = 100
-print("Uploading vectors to Pinecone...")
-
-for i in tqdm(range(0, len(vectors), BATCH_SIZE), desc="Uploading"):
-    batch = vectors[i:i + BATCH_SIZE]
-    index.upsert(vectors=batch, namespace=namespace)
-
-print(f"Upload complete: {len(vectors)} vectors upserted to namespace '{namespace}' in index gymbro-rag")
\ No newline at end of file
+EMBEDDING_MODEL = "text-embedding-3-small"
+NAMESPACE = "gymbro-data"
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+# Pages are buffered until they hold this much text, then split
+CHUNK_WINDOW_CHARS = 40 * CHUNK_SIZE
+
+# Pages extracted per process pool task
+PAGES_PER_TASK = 25
+
+EMBED_BATCH_SIZE = 32
+UPSERT_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+# Defaults for the concurrency flags
+EXTRACT_WORKERS = int(os.getenv("RAG_EXTRACT_WORKERS", os.cpu_count() or 1))
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", 4))
+UPSERT_CONCURRENCY = int(os.getenv("RAG_UPSERT_CONCURRENCY", 2))
+
+# Retries for rate limits (429), server errors and dropped connections
+MAX_RETRIES = int(os.getenv("RAG_MAX_RETRIES", 6))
+BACKOFF_BASE = 1.0   # in seconds
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+RETRY_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+# Local index: build an HNSW graph (if hnswlib is installed) from this many vectors up
+HNSW_MIN_VECTORS = int(os.getenv("RAG_HNSW_MIN_VECTORS", 20000))
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_BATCH_SIZE = 10000
+
+# BM25 parameters and the words left out of the keyword index. The stopwords
+# are saved with the index so queries are tokenized the same way.
+BM25_K1 = 1.2
+BM25_B = 0.75
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = sorted("""
+a about after all also am an and any are as at be because been before being between both but by can could
+did do does doing during each few for from further had has have having he her here hers him his how i if in
+into is it its just me more most my no nor not of off on once only or other our out over own same she should
+so some such than that the their them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your
+""".split())
+
+
+def chunk_id(source, text):
+    return hashlib.sha256(f"{source}\n{text}".encode("utf-8")).hexdigest()[:32]
+
+
+class Manifest:
+    """
+    Append-only record of the chunk IDs currently in the namespace. Each line
+    is {"op": "upsert"|"delete", "id": ...}; the first line records the
+    embedding model and namespace the IDs belong to.
+    """
+
+    def __init__(self, path, model, namespace):
+        self.path = path
+        self.header = {"model": model, "namespace": namespace}
+        self.ids = set()
+        self.file = None
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines = (json.loads(line) for line in f if line.strip())
+                header = next(lines, None)
+                if header == self.header:
+                    for entry in lines:
+                        if entry["op"] == "upsert":
+                            self.ids.add(entry["id"])
+                        else:
+                            self.ids.discard(entry["id"])
+                elif header is not None:
+                    print(f"Manifest was built for {header}; re-embedding everything for {self.header}")
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def record(self, op, ids):
+        if self.file is None:
+            self.compact()
+        for chunk_id in ids:
+            self.file.write(json.dumps({"op": op, "id": chunk_id}) + "\n")
+            if op == "upsert":
+                self.ids.add(chunk_id)
+            else:
+                self.ids.discard(chunk_id)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def compact(self):
+        """
+        Rewrites the manifest as the header plus one upsert per live ID.
+        """
+        self.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for chunk_id in sorted(self.ids):
+                f.write(json.dumps({"op": "upsert", "id": chunk_id}) + "\n")
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def clear(self):
+        self.ids = set()
+        self.compact()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def swap_in(build_dir, directory):
+    """
+    Replaces `directory` with the finished `build_dir`.
+    """
+    old_dir = directory + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(build_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class LocalIndexWriter:
+    """
+    Writes the local vector index (layout in services/vector_index.py). The
+    build goes to a sibling directory and replaces the old index on commit;
+    vectors of chunks the old index already has are copied, not re-embedded.
+    """
+
+    def __init__(self, directory, model, dtype, reuse=True):
+        self.directory = directory
+        self.model = model
+        self.dtype = dtype
+        self.dim = None
+        self.count = 0
+        self.previous = {}
+        self.previous_vectors = None
+        self.previous_scales = None
+        if reuse:
+            self.load_previous()
+
+        self.tmp_dir = directory + ".tmp"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        self.vectors_file = open(os.path.join(self.tmp_dir, "vectors.bin"), "wb")
+        self.scales_file = open(os.path.join(self.tmp_dir, "scales.bin"), "wb") if dtype == "int8" else None
+        self.metadata_file = open(os.path.join(self.tmp_dir, "metadata.jsonl"), "w", encoding="utf-8")
+
+    def load_previous(self):
+        meta_path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model"] != self.model:
+            print(f"Local index was built with {meta['model']}; re-embedding everything with {self.model}")
+            return
+        if not meta["count"]:
+            return
+
+        self.previous_vectors = np.memmap(
+            os.path.join(self.directory, "vectors.bin"), dtype=meta["dtype"], mode="r", shape=(meta["count"], meta["dim"])
+        )
+        if meta["dtype"] == "int8":
+            self.previous_scales = np.fromfile(os.path.join(self.directory, "scales.bin"), dtype=np.float32)
+        with open(os.path.join(self.directory, "metadata.jsonl"), encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                entry = json.loads(line)
+                self.previous[entry["id"]] = (row, entry)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.previous
+
+    def keep(self, chunk_id):
+        row, entry = self.previous[chunk_id]
+        vector = np.asarray(self.previous_vectors[row], dtype=np.float32)
+        if self.previous_scales is not None:
+            vector = vector * self.previous_scales[row]
+        self.write(entry, vector)
+
+    def add(self, vectors):
+        for vector in vectors:
+            self.write({"id": vector["id"], **vector["metadata"]}, np.asarray(vector["values"], dtype=np.float32))
+
+    def write(self, entry, vector):
+        if self.dim is None:
+            self.dim = len(vector)
+        # Unit length, so a dot product is the cosine similarity
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            self.vectors_file.write(np.round(vector / scale).astype(np.int8).tobytes())
+            self.scales_file.write(np.float32(scale).tobytes())
+        else:
+            self.vectors_file.write(vector.astype(np.float32).tobytes())
+        self.metadata_file.write(json.dumps(entry) + "\n")
+        self.count += 1
+
+    def commit(self):
+        self.close_files()
+        with open(os.path.join(self.tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim, "count": self.count, "dtype": self.dtype}, f)
+        if hnswlib is not None and self.count >= HNSW_MIN_VECTORS:
+            self.build_graph()
+
+        swap_in(self.tmp_dir, self.directory)
+
+    def build_graph(self):
+        vectors = np.memmap(
+            os.path.join(self.tmp_dir, "vectors.bin"), dtype=self.dtype, mode="r", shape=(self.count, self.dim)
+        )
+        scales = np.fromfile(os.path.join(self.tmp_dir, "scales.bin"), dtype=np.float32) if self.dtype == "int8" else None
+
+        graph = hnswlib.Index(space="ip", dim=self.dim)
+        graph.init_index(max_elements=self.count, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        for start in tqdm(range(0, self.count, HNSW_BATCH_SIZE), desc="Building HNSW graph"):
+            block = np.asarray(vectors[start:start + HNSW_BATCH_SIZE], dtype=np.float32)
+            if scales is not None:
+                block = block * scales[start:start + len(block), None]
+            graph.add_items(block, np.arange(start, start + len(block)))
+        graph.save_index(os.path.join(self.tmp_dir, "hnsw.bin"))
+
+    def close_files(self):
+        for f in (self.vectors_file, self.scales_file, self.metadata_file):
+            if f is not None and not f.closed:
+                f.close()
+
+    def close(self):
+        """
+        Discards the build if it wasn't committed.
+        """
+        self.close_files()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def tokenize(text, stopwords):
+    # Must match services/lexical_index.tokenize
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in stopwords:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalIndexBuilder:
+    """
+    Builds the BM25 inverted index from the chunks streaming through the
+    pipeline. Documents go straight to disk; postings are kept in memory and
+    written on commit with their BM25 weights precomputed, so a query only
+    sums the weights of its terms' postings.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.stopwords = frozenset(STOPWORDS)
+        self.ids = set()
+        self.lengths = []
+        self.postings = {}
+
+        self.tmp_dir = directory + ".tmp"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        self.docs_file = open(os.path.join(self.tmp_dir, "docs.jsonl"), "w", encoding="utf-8")
+
+    def collect(self, chunks):
+        """
+        Passes `chunks` through, indexing each one on the way.
+        """
+        for chunk in chunks:
+            if chunk["id"] not in self.ids:
+                self.add(chunk)
+            yield chunk
+
+    def add(self, chunk):
+        row = len(self.lengths)
+        self.ids.add(chunk["id"])
+        tokens = tokenize(chunk["text"], self.stopwords)
+        self.lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((row, tf))
+        self.docs_file.write(json.dumps(
+            {"id": chunk["id"], "text": chunk["text"], "source": chunk["source"], "category": chunk["category"]}
+        ) + "\n")
+
+    def commit(self):
+        self.docs_file.close()
+        count = len(self.lengths)
+        lengths = np.array(self.lengths, dtype=np.float32)
+        avgdl = float(lengths.mean()) if count and lengths.mean() > 0 else 1.0
+
+        vocab = {}
+        doc_ids, weights = [], []
+        offset = 0
+        for term in sorted(self.postings):
+            rows, tfs = zip(*self.postings[term])
+            rows = np.array(rows, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float32)
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[rows] / avgdl)
+            doc_ids.append(rows)
+            weights.append(idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+            vocab[term] = [offset, offset + len(rows), round(idf, 6)]
+            offset += len(rows)
+
+        np.savez(
+            os.path.join(self.tmp_dir, "postings.npz"),
+            doc_ids=np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            weights=np.concatenate(weights).astype(np.float32) if weights else np.zeros(0, dtype=np.float32)
+        )
+        with open(os.path.join(self.tmp_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f)
+        with open(os.path.join(self.tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": count, "terms": len(vocab), "avgdl": avgdl, "k1": BM25_K1, "b": BM25_B, "stopwords": STOPWORDS}, f)
+
+        swap_in(self.tmp_dir, self.directory)
+        print(f"Keyword index written: {count} chunks, {len(vocab)} terms in {self.directory}")
+
+    def close(self):
+        """
+        Discards the build if it wasn't committed.
+        """
+        if not self.docs_file.closed:
+            self.docs_file.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def bounded_map(executor, fn, items, limit):
+    """
+    Like executor.map, but submits at most `limit` tasks ahead of the
+    consumer, so a slow downstream stage holds back the upstream ones.
+    Results come back in order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def error_status(e):
+    for source in (e, getattr(e, "response", None)):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def retry_after(e):
+    headers = getattr(getattr(e, "response", None), "headers", None) or getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def with_retries(fn, *args, **kwargs):
+    """
+    Calls fn, retrying rate limits and transient failures with exponential
+    backoff and jitter (or the server's Retry-After, when it sends one).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            retryable = error_status(e) in RETRY_STATUSES or type(e).__name__ in RETRY_ERRORS
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+            delay = retry_after(e) or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            tqdm.write(f"{type(e).__name__}; retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
+
+
+def page_ranges():
+    for path, _, _ in pdf_paths:
+        with fitz.open(path) as doc:
+            page_count = doc.page_count
+        for start in range(0, page_count, PAGES_PER_TASK):
+            yield path, start, min(start + PAGES_PER_TASK, page_count)
+
+
+def extract_pages(task):
+    """
+    Runs on the process pool: the text of pages [start, end) of one PDF.
+    """
+    path, start, end = task
+    with fitz.open(path) as doc:
+        return path, [doc[i].get_text() for i in range(start, end)]
+
+
+def iter_pages(pool, workers):
+    """
+    (path, page text) for every page of every PDF, in order.
+    """
+    for path, texts in bounded_map(pool, extract_pages, page_ranges(), 2 * workers):
+        for text in texts:
+            yield path, text
+
+
+def split_pages(pages, splitter):
+    """
+    Chunks of one PDF, split from a sliding window of pages so the whole
+    text is never held or concatenated.
+    """
+    pending = []
+    size = 0
+    for text in pages:
+        pending.append(text)
+        size += len(text)
+        if size >= CHUNK_WINDOW_CHARS:
+            chunks = splitter.split_text("".join(pending))
+            # The last chunk may continue on the next page; carry it over
+            yield from chunks[:-1]
+            pending = chunks[-1:]
+            size = sum(len(part) for part in pending)
+    if pending:
+        yield from splitter.split_text("".join(pending))
+
+
+def iter_chunks(splitter, pool, workers):
+    sources = {path: (source, category) for path, source, category in pdf_paths}
+    for path, pages in groupby(iter_pages(pool, workers), key=lambda page: page[0]):
+        source, category = sources[path]
+        for text in split_pages((text for _, text in pages), splitter):
+            yield {
+                "id": chunk_id(source, text),
+                "text": text,
+                "source": source,
+                "category": category
+            }
+
+
+def embed_vectors(chunks, embedder, pool, concurrency):
+    """
+    Pinecone vectors for `chunks`, embedded EMBED_BATCH_SIZE at a time with
+    up to `concurrency` batches in flight.
+    """
+    def embed_batch(batch):
+        embeddings = with_retries(embedder.embed_documents, [chunk["text"] for chunk in batch])
+        return [
+            {
+                "id": chunk["id"],
+                "values": embedding,
+                "metadata": {"text": chunk["text"], "source": chunk["source"], "category": chunk["category"]}
+            }
+            for chunk, embedding in zip(batch, embeddings)
+        ]
+
+    for vectors in bounded_map(pool, embed_batch, batched(chunks, EMBED_BATCH_SIZE), concurrency):
+        yield from vectors
+
+
+def upsert_vectors(vectors, index, manifest, pool, concurrency):
+    """
+    Upserts `vectors` UPSERT_BATCH_SIZE at a time with up to `concurrency`
+    batches in flight, recording each batch in the manifest once Pinecone
+    has it. Returns the number upserted.
+    """
+    def upsert_batch(batch):
+        with_retries(index.upsert, vectors=batch, namespace=NAMESPACE)
+        return [vector["id"] for vector in batch]
+
+    upserted = 0
+    with tqdm(desc="Upserting", unit="vector") as progress:
+        for ids in bounded_map(pool, upsert_batch, batched(vectors, UPSERT_BATCH_SIZE), concurrency):
+            manifest.record("upsert", ids)
+            upserted += len(ids)
+            progress.update(len(ids))
+    return upserted
+
+
+def delete_stale(ids, index, manifest):
+    for i in tqdm(range(0, len(ids), DELETE_BATCH_SIZE), desc="Deleting"):
+        batch_ids = ids[i:i + DELETE_BATCH_SIZE]
+        with_retries(index.delete, ids=batch_ids, namespace=NAMESPACE)
+        manifest.record("delete", batch_ids)
+
+
+def unindexed(chunks, indexed, seen, counts, keep=None):
+    """
+    The chunks not in `indexed` yet, skipping duplicates. Chunks already
+    indexed are passed to `keep`, when given.
+    """
+    for chunk in chunks:
+        if chunk["id"] in seen:
+            continue
+        seen.add(chunk["id"])
+        counts["chunks"] += 1
+        if chunk["id"] in indexed:
+            counts["indexed"] += 1
+            if keep is not None:
+                keep(chunk["id"])
+        else:
+            yield chunk
+
+
+def sync_pinecone(args, chunks, embedder, embed_pool):
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(host=os.getenv("PINECONE_INDEX"))
+    manifest = Manifest(MANIFEST_PATH, EMBEDDING_MODEL, NAMESPACE)
+
+    if args.reset:
+        print(f"Clearing namespace '{NAMESPACE}'...")
+        try:
+            index.delete(delete_all=True, namespace=NAMESPACE)
+        except Exception as e:
+            # Pinecone rejects deletes on a namespace that doesn't exist yet
+            print("Nothing to clear:", e)
+        manifest.clear()
+
+    seen = set()
+    counts = {"chunks": 0, "indexed": 0}
+    upsert_pool = ThreadPoolExecutor(max_workers=args.upsert_concurrency)
+
+    try:
+        vectors = embed_vectors(unindexed(chunks, manifest, seen, counts), embedder, embed_pool, args.embed_concurrency)
+        upserted = upsert_vectors(vectors, index, manifest, upsert_pool, args.upsert_concurrency)
+        stale_ids = sorted(manifest.ids - seen)
+        print(f"{counts['chunks']} chunks: {counts['indexed']} already indexed, {upserted} embedded, {len(stale_ids)} to delete")
+        if stale_ids:
+            delete_stale(stale_ids, index, manifest)
+        manifest.compact()
+    finally:
+        upsert_pool.shutdown(cancel_futures=True)
+        manifest.close()
+
+    print(f"Sync complete: {len(manifest)} vectors in namespace '{NAMESPACE}'")
+
+
+def sync_local(args, chunks, embedder, embed_pool):
+    writer = LocalIndexWriter(LOCAL_INDEX_DIR, EMBEDDING_MODEL, "int8" if args.int8 else "float32", reuse=not args.reset)
+    seen = set()
+    counts = {"chunks": 0, "indexed": 0}
+
+    try:
+        new_chunks = unindexed(chunks, writer, seen, counts, keep=writer.keep)
+        embedded = 0
+        with tqdm(desc="Writing", unit="vector") as progress:
+            for batch in batched(embed_vectors(new_chunks, embedder, embed_pool, args.embed_concurrency), UPSERT_BATCH_SIZE):
+                writer.add(batch)
+                embedded += len(batch)
+                progress.update(len(batch))
+        print(f"{counts['chunks']} chunks: {counts['indexed']} reused from the previous build, {embedded} embedded")
+        writer.commit()
+    finally:
+        writer.close()
+
+    print(f"Local index written: {writer.count} {writer.dtype} vectors in {LOCAL_INDEX_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the GymBro RAG index with the PDFs in documents/.")
+    parser.add_argument("--reset", action="store_true", help="Delete everything in the index and rebuild from scratch")
+    parser.add_argument("--backend", choices=["pinecone", "local"], default=os.getenv("VECTOR_BACKEND", "pinecone"),
+                        help="Sync the Pinecone namespace or write the local index")
+    parser.add_argument("--int8", action="store_true", help="Local index: store int8-quantized vectors (4x smaller)")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="Processes extracting PDF pages")
+    parser.add_argument("--embed-concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding batches in flight")
+    parser.add_argument("--upsert-concurrency", type=int, default=UPSERT_CONCURRENCY, help="Upsert batches in flight")
+    args = parser.parse_args()
+
+    # Retries are handled by with_retries so backoff is shared across batches
+    embedder = OpenAIEmbeddings(model=EMBEDDING_MODEL, max_retries=0)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    print("Reading from:", DOCUMENTS_DIR)
+
+    extract_pool = ProcessPoolExecutor(max_workers=args.workers)
+    embed_pool = ThreadPoolExecutor(max_workers=args.embed_concurrency)
+
+    lexical = LexicalIndexBuilder(LEXICAL_INDEX_DIR)
+
+    try:
+        chunks = lexical.collect(iter_chunks(splitter, extract_pool, args.workers))
+        if args.backend == "local":
+            sync_local(args, chunks, embedder, embed_pool)
+        else:
+            sync_pinecone(args, chunks, embedder, embed_pool)
+        lexical.commit()
+    finally:
+        for pool in (extract_pool, embed_pool):
+            pool.shutdown(cancel_futures=True)
+        lexical.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,10 @@ from routes.profile import profile_bp
 from routes.logging import logging_bp
 from routes.agent import agent_bp
 from routes.pinecone import pinecone_bp
+from routes.metrics import metrics_bp
 from flask_jwt_extended import JWTManager
+from services.compression import init_compression
+from services.indexes import ensure_indexes
 
 from datetime import datetime, timedelta
 def create_app():
@@ -21,6 +24,13 @@ def create_app():
     app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=Config.JWT_REFRESH_TOKEN_EXPIRES)
 
     jwt = JWTManager(app)
+    init_compression(app)
+
+    if Config.MONGO_ENSURE_INDEXES:
+        try:
+            ensure_indexes()
+        except Exception as e:
+            app.logger.warning("Index bootstrap failed: %s", e)
 
 
 
@@ -30,6 +40,7 @@ def create_app():
     app.register_blueprint(logging_bp, url_prefix="/log")
     app.register_blueprint(agent_bp, url_prefix="/agent")
     app.register_blueprint(pinecone_bp, url_prefix="/pinecone")
+    app.register_blueprint(metrics_bp, url_prefix="/metrics")
 
 
 
@@ -7,6 +7,31 @@ class Config:
     # MongoDB connection URI 
     MONGODB_URI = os.getenv("MONGODB_URI", "")
 
+    # Database name; empty uses the one in the URI path, else "gymbro"
+    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "")
+
+    # Per-process connection pool (services/db.py). With gevent workers every
+    # in-flight request can hold a connection; watch /metrics/pool for
+    # checkout waits before raising SERVER_WORKER_CONNECTIONS
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 10000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000))
+
+    # e.g. "primary", "primaryPreferred", "secondaryPreferred"; w is a node
+    # count or "majority"
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN", "majority")
+
+    # Pool checkouts that waited at least this long count as slow in /metrics/pool
+    MONGO_SLOW_CHECKOUT_MS = float(os.getenv("MONGO_SLOW_CHECKOUT_MS", 50))
+
+    # Create missing indexes when the app starts (see services/indexes.py)
+    MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+
     # JWT settings
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change_me_to_a_random_string")
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 15))   # in minutes
@@ -16,4 +41,99 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
     # ElevenLavbs
-    EL_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
\ No newline at end of file
+    EL_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+
+    # Chat routing: "classify" runs classify_message before the handler,
+    # "single" lets one model call pick the category and answer it
+    GYMBRO_ROUTING = os.getenv("GYMBRO_ROUTING", "classify")
+
+    # Intent classification: "hybrid" answers from the local classifier and
+    # only calls the LLM below the confidence threshold, "llm" always calls it
+    INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "hybrid")
+    INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", 0.8))
+
+    # Threads used to prefetch the 7-day log context during /gymbro/chat
+    CONTEXT_PREFETCH_WORKERS = int(os.getenv("CONTEXT_PREFETCH_WORKERS", 8))
+
+    # Serving: "async" runs gevent workers so one process can hold hundreds of
+    # LLM/TTS-bound requests, "sync" runs threaded workers
+    SERVER_MODE = os.getenv("SERVER_MODE", "async")
+    SERVER_HOST = os.getenv("HOST", "0.0.0.0")
+    SERVER_PORT = int(os.getenv("PORT", 5000))
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 2))
+    SERVER_WORKER_CONNECTIONS = int(os.getenv("SERVER_WORKER_CONNECTIONS", 1000))
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", 8))
+
+    # ElevenLabs audio cache: in-memory LRU plus an optional on-disk tier
+    # (leave TTS_CACHE_DIR empty to disable the disk tier)
+    TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "tts"))
+    TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+
+    # /pinecone/query embedding cache: in-memory LRU plus an optional SQLite
+    # tier that survives restarts (leave EMBEDDING_CACHE_PATH empty to disable it)
+    EMBEDDING_CACHE_ENTRIES = int(os.getenv("EMBEDDING_CACHE_ENTRIES", 10000))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(os.path.dirname(__file__), ".cache", "embeddings.sqlite3"))
+    EMBEDDING_CACHE_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", 200000))
+
+    # Where /pinecone/query searches: "pinecone" (remote) or "local", the
+    # in-process index built by `python RAG/setup.py --backend local`
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+    VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(os.path.dirname(__file__), "RAG", ".cache", "index"))
+    # Local search: "auto" walks the HNSW graph when the build wrote one and
+    # hnswlib is installed, "exact" always scans the whole matrix
+    VECTOR_SEARCH = os.getenv("VECTOR_SEARCH", "auto")
+    VECTOR_HNSW_EF = int(os.getenv("VECTOR_HNSW_EF", 64))
+
+    # BM25 keyword index over the same chunks, also built by RAG/setup.py
+    LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", os.path.join(os.path.dirname(__file__), "RAG", ".cache", "lexical"))
+    # /pinecone/query retrieval (services/retrieval.py): "hybrid" fuses keyword
+    # and vector results, "vector" and "lexical" use one side only
+    RAG_RETRIEVAL = os.getenv("RAG_RETRIEVAL", "hybrid")
+    RAG_RRF_K = int(os.getenv("RAG_RRF_K", 60))
+    # Results taken from each side before fusion
+    RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", 20))
+    # Hybrid queries skip embedding and vector search when the best keyword hit
+    # contains a rare query term (IDF 3.0 is roughly in under 5% of chunks) and
+    # its BM25 score reaches RAG_LEXICAL_MIN_SCORE
+    RAG_LEXICAL_MIN_IDF = float(os.getenv("RAG_LEXICAL_MIN_IDF", 3.0))
+    RAG_LEXICAL_MIN_SCORE = float(os.getenv("RAG_LEXICAL_MIN_SCORE", 2.5))
+
+    # Replies kept per user so /gymbro/audio/<reply_id> can synthesize them later
+    RECENT_REPLIES_KEPT = int(os.getenv("RECENT_REPLIES_KEPT", 20))
+
+    # Gzip JSON responses at least this large
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+
+    # Per-process cache of each user's 7-day meal/workout context. Writes in
+    # this process update it immediately; the TTL bounds staleness from others
+    CONTEXT_CACHE_USERS = int(os.getenv("CONTEXT_CACHE_USERS", 5000))
+    CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", 300))  # in seconds
+
+    # Where calendar highlights come from: "aggregate" groups the log
+    # collections by day, "summaries" reads the per-day summary documents
+    # (run `python -m services.summaries --backfill` before switching)
+    HIGHLIGHTS_SOURCE = os.getenv("HIGHLIGHTS_SOURCE", "aggregate")
+
+    # Per-process cache of /profile/analytics results, keyed on the data version
+    ANALYTICS_CACHE_USERS = int(os.getenv("ANALYTICS_CACHE_USERS", 2000))
+
+    # How long a user's data version (used for ETags) is trusted in-process
+    # before re-reading it; bounds how long a 304 or the analytics cache can
+    # lag a write made in another worker
+    DATA_VERSION_TTL = int(os.getenv("DATA_VERSION_TTL", 5))  # in seconds
+
+    # /log/bulk: documents per insert_many batch and per-line errors reported
+    BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 1000))
+    BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", 1000))
+    # Longest accepted line; longer ones are rejected without being buffered
+    BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", 1024 * 1024))
+
+    # /log/export: documents fetched per cursor round trip
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+    # How meals and workouts are stored: "documents" keeps one document per
+    # log, "buckets" one document per user per week (services/storage.py).
+    # Run `python -m services.storage migrate` before switching to buckets
+    LOG_STORAGE = os.getenv("LOG_STORAGE", "documents")
@@ -0,0 +1,16 @@
+from config import Config
+
+bind = f"{Config.SERVER_HOST}:{Config.SERVER_PORT}"
+workers = Config.SERVER_WORKERS
+
+if Config.SERVER_MODE == "async":
+    # gunicorn patches the worker with gevent before loading wsgi:app
+    worker_class = "gevent"
+    worker_connections = Config.SERVER_WORKER_CONNECTIONS
+else:
+    worker_class = "gthread"
+    threads = Config.SERVER_THREADS
+
+# Chat turns wait on several LLM and TTS calls; streamed replies stay open longer still
+timeout = 120
+graceful_timeout = 30
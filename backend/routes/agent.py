@@ -2,15 +2,15 @@
 from flask import Blueprint, request, jsonify
 from elevenlabs.client import ElevenLabs
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.db import get_user_collection, get_meal_collection, get_workout_collection
-from datetime import datetime, timedelta
+from services.db import get_user_collection
+from services.context import meal_context, workout_context, recent_meals, recent_workouts, compact_meals, compact_workouts
+from services.logs import insert_meal, insert_workout
+from datetime import datetime
 
 
 agent_bp = Blueprint("agent", __name__)
 
 users = get_user_collection()
-meals = get_meal_collection()
-workouts = get_workout_collection()
 
 def convertISOtoDateTimeObject(iso_string):
     return datetime.fromisoformat(iso_string.replace("Z", "+00:00"))
@@ -31,26 +31,7 @@ def nutrition_advice():
 
     username = get_jwt_identity()
 
-    seven_days_ago = datetime.now() - timedelta(days=7)
-
-    past_seven_days_meals = list(meals.find({ 
-        "username": username, 
-        "meal_date": {"$gte" : seven_days_ago}
-    }))
-
-    meal_logs = ""
-    if past_seven_days_meals:
-        for meal in past_seven_days_meals:
-            meal_type = meal.get("meal_type", "Meal")
-            meal_date = meal.get("meal_date")
-            meal_items = meal.get("meal_items", [])
-            date_str = meal_date.strftime('%Y-%m-%d') if isinstance(meal_date, datetime) else str(meal_date)
-
-            meal_logs += f"- {meal_type} on {date_str}:\n"
-            for item in meal_items:
-                meal_logs += f"  -{item} \n"
-    else:
-        meal_logs = "- No meals logged.\n"
+    meal_logs = meal_context(username)
 
     print(meal_logs)
 
@@ -72,39 +53,61 @@ def workout_advice():
 
     username = get_jwt_identity()
 
-    seven_days_ago = datetime.now() - timedelta(days=7)
-
-    past_seven_days_workouts = list(workouts.find({ 
-        "username": username, 
-        "workout_date": {"$gte" : seven_days_ago}
-    }))
-
-    workout_logs = ""
-    if past_seven_days_workouts:
-        for workout in past_seven_days_workouts:
-            workout_type = workout.get("workout_type", "Workout")
-            workout_date = workout.get("workout_date")
-            activities = workout.get("workout_activities", [])
-            date_str = workout_date.strftime('%Y-%m-%d') if isinstance(workout_date, datetime) else str(workout_date)
-
-            workout_logs += f"- {workout_type} on {date_str}:\n"
-            for ex in activities:
-                name = ex.get("name", "Exercise")
-                mode = ex.get("mode", "")
-                if mode == "reps":
-                    sets = ex.get("sets", "?")
-                    reps = ex.get("reps", "?")
-                    workout_logs += f"  -{name}: {sets} sets of {reps} reps\n"
-                else:
-                    duration = ex.get("duration", "?")
-                    workout_logs += f"  -{name}: {duration} minutes\n"
-    else:
-        workout_logs = "- No workouts logged.\n"
-
-    
+    workout_logs = workout_context(username)
 
     return jsonify({"log": workout_logs.strip()})
 
+CONTEXT_SECTIONS = ("profile", "meals", "workouts")
+MAX_CONTEXT_DAYS = 30
+
+@agent_bp.route("/context", methods=["GET"])
+@jwt_required()
+def user_context():
+    """
+    Return the user's profile, meals and workouts in one compact response for
+    the realtime voice agent.
+
+    Query params:
+        sections: comma-separated subset of profile,meals,workouts (default: all)
+        days: how many days of logs to include, 1-30 (default: 7)
+
+    Returns:
+        JSON like {"profile": {...}, "meals": {"2025-06-05": ["lunch: rice; chicken"]},
+                   "workouts": {"2025-06-05": ["push: bench 3x10"]}}
+    """
+    username = get_jwt_identity()
+
+    sections = [s.strip() for s in request.args.get("sections", ",".join(CONTEXT_SECTIONS)).split(",") if s.strip()]
+    unknown = [s for s in sections if s not in CONTEXT_SECTIONS]
+    if unknown:
+        return jsonify({"error": f"Unknown sections: {', '.join(unknown)}"}), 400
+
+    days = request.args.get("days", 7, type=int)
+    if days < 1 or days > MAX_CONTEXT_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_CONTEXT_DAYS}"}), 400
+
+    result = {}
+
+    if "profile" in sections:
+        user = users.find_one({"username": username}, {"_id": 0, "name": 1, "age": 1, "weight": 1, "height": 1, "goal": 1})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        result["profile"] = {
+            "name": user.get("name"),
+            "age": user.get("age"),
+            "weight_lb": user.get("weight"),
+            "height_in": user.get("height"),
+            "goal": user.get("goal")
+        }
+
+    if "meals" in sections:
+        result["meals"] = compact_meals(recent_meals(username, days))
+
+    if "workouts" in sections:
+        result["workouts"] = compact_workouts(recent_workouts(username, days))
+
+    return jsonify(result)
+
 @agent_bp.route("/log_meal", methods=["POST"])
 @jwt_required()
 def agent_log_meal():
@@ -117,7 +120,7 @@ def agent_log_meal():
     if not date or not items:
         return jsonify({"error": "Date and items are required"}), 400
 
-    meals.insert_one({ "username": username, "meal_date": date, "meal_type": type, "meal_items": items })
+    insert_meal(username, date, type, items)
     return jsonify({ "msg": "Meal logged successfully" }), 200
 
 @agent_bp.route("/log_workout", methods=["POST"])
@@ -134,5 +137,5 @@ def agent_log_workout():
     if not date or not activities:
         return jsonify({"error": "Date and activities are required"}), 400
 
-    workouts.insert_one({ "username": username, "workout_date": date, "workout_type": type, "workout_activities": activities, "notes": notes })
+    insert_workout(username, date, type, activities, notes)
     return jsonify({ "msg": "Workout logged successfully" }), 200
\ No newline at end of file
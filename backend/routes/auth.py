@@ -1,4 +1,5 @@
 import bcrypt
+from pymongo.errors import DuplicateKeyError
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
     create_access_token,
@@ -39,16 +40,20 @@ def signup():
 
     # Hash and store
     pw_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-    users.insert_one({
-        "username": username,
-        "password_hash": pw_hash,
-        "name": name,
-        "gender": gender,
-        "age": age,
-        "weight": weight,
-        "height": height,
-        "goal": goal,
-    })
+    try:
+        users.insert_one({
+            "username": username,
+            "password_hash": pw_hash,
+            "name": name,
+            "gender": gender,
+            "age": age,
+            "weight": weight,
+            "height": height,
+            "goal": goal,
+        })
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup; the unique index caught it
+        return jsonify({"error": "username already taken"}), 409
 
     return jsonify({"msg": "User created"}), 201
 
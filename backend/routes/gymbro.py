@@ -1,12 +1,17 @@
 import base64
 import json
-from flask import Blueprint, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
 from openai import OpenAI
-from elevenlabs.client import ElevenLabs
 from dotenv import load_dotenv
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.db import get_user_collection, get_meal_collection, get_workout_collection
-from datetime import datetime, timedelta
+from services.db import get_user_collection
+from services.intent import classify_local
+from services import tts
+from services.context import meal_context, workout_context
+from services.analytics import training_summary
+from services.logs import insert_meal, insert_workout
+from datetime import datetime
 from config import Config
 import requests
 
@@ -16,11 +21,10 @@ gymbro_bp = Blueprint("gymbro", __name__)
 load_dotenv()
 client = OpenAI(api_key=Config.OPENAI_API_KEY)
 
-elevenlabs = ElevenLabs(api_key=Config.EL_API_KEY)
-
 users = get_user_collection()
-meals = get_meal_collection()
-workouts = get_workout_collection()
+
+# Runs the 7-day log queries for /chat alongside classification
+context_executor = ThreadPoolExecutor(max_workers=Config.CONTEXT_PREFETCH_WORKERS)
 
 @gymbro_bp.route("/session", methods=["GET"])
 @jwt_required()
@@ -53,8 +57,21 @@ def create_realtime_session():
 @jwt_required()
 def chat():
     """
-    Expects a JSON: {"message": "<user's text>" }
-    Returns a JSON: {"reply": "assistant's respone>" }
+    Expects a JSON: {"message": "<user's text>", "stream": <optional bool>, "audio": <optional str> }
+    Returns a JSON: {"reply": "assistant's respone>", "reply_id": "<id>", "audio_base64": "<mp3>" }
+
+    "audio" selects how speech is delivered:
+        "inline"   (default) base64 MP3 embedded in the reply
+        "deferred" no audio in the reply; fetch it from "audio_url" in the
+                   format and bitrate the client wants (see /audio/<reply_id>)
+        "none"     text only
+
+    When "stream" is true (or the client sends Accept: text/event-stream) the
+    reply is sent as Server-Sent Events instead:
+        event: text   data: {"delta": "<tokens>"}
+        event: audio  data: {"chunk": "<base64 mp3 bytes>"}
+        event: done   data: {"reply": "<full text>", "last_message_id": "<id>", "reply_id": "<id>"}
+        event: error  data: {"error": "<message>"}
     """
     data = request.get_json() or {}
     user_message = data.get("message", "").strip()
@@ -62,56 +79,154 @@ def chat():
         return jsonify({"error": "No Message Provided"}), 400
 
     username = get_jwt_identity()
+
+    # Start both 7-day log queries now so they overlap the user lookup and
+    # classification; the handler only waits on the one it ends up needing
+    context = LogContext(username, prefetch=True)
+
     user = users.find_one({"username": username})
 
 
 
     if not user:
         return jsonify({"error": "User not found"}), 404
-    
-    classification = classify_message(user, user_message)
 
-    print(classification)
-    
-    try:
-        if classification == "nutrition":
-            response = handle_nutrition(user, user_message)
-        elif classification == "workout":
-            response = handle_workout(user, user_message)
-        elif classification == "log meal/workout":
-            response = handle_logging_request(user, user_message)
-        else:
-            response = general(user, user_message)
+    audio_mode = data.get("audio", "inline")
+    if audio_mode not in ("inline", "deferred", "none"):
+        return jsonify({"error": "audio must be one of inline, deferred, none"}), 400
 
-        
-        users.update_one(
-            {"username": username},
-            {"$set": {
-                "last_message_id": response.id
-            }}
+    stream = data.get("stream") is True or "text/event-stream" in request.headers.get("Accept", "")
+    if stream:
+        return Response(
+            stream_with_context(stream_chat(user, user_message, context, audio_mode)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
 
-        reply = response.output_text
+    try:
+        response = respond(user, user_message, context=context)
 
-        audio = elevenlabs.text_to_speech.convert(
-            text=reply,
-            voice_id="TX3LPaxmHKxFdv7VOQHJ",
-            model_id="eleven_turbo_v2",
-        )
+        reply = response.output_text
 
-        audio_bytes = b"".join(audio)
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        record_reply(username, response.id, reply)
 
-        return jsonify({
+        body = {
             "reply": reply,
-            "audio_base64": audio_base64
-        })
+            "reply_id": response.id
+        }
+
+        if audio_mode == "inline":
+            audio_bytes = tts.synthesize(reply)
+            body["audio_base64"] = base64.b64encode(audio_bytes).decode("utf-8")
+        elif audio_mode == "deferred":
+            body["audio_url"] = url_for("gymbro.reply_audio", reply_id=response.id)
+
+        return jsonify(body)
 
     except RuntimeError as err:
         return jsonify({ "error": str(err) }), 500
+
+
+def record_reply(username, response_id, reply):
+    """
+    Chains the next turn onto this response and keeps the reply text around
+    so its audio can be fetched later from /audio/<reply_id>.
+    """
+    users.update_one(
+        {"username": username},
+        {
+            "$set": {
+                "last_message_id": response_id
+            },
+            "$push": {
+                "recent_replies": {
+                    "$each": [{"id": response_id, "text": reply}],
+                    "$slice": -Config.RECENT_REPLIES_KEPT
+                }
+            }
+        }
+    )
+
+
+def respond(user, user_message, stream=False, context=None):
+    """
+    Classifies the message and dispatches it to the matching handler.
+    With stream=True the handler returns an iterator of Responses API events
+    instead of a finished response.
+    """
+    if Config.GYMBRO_ROUTING == "single":
+        return route_message(user, user_message, stream=stream, context=context)
+
+    classification = classify_intent(user, user_message)
+
+    print(classification)
+
+    if classification == "nutrition":
+        return handle_nutrition(user, user_message, stream=stream, context=context)
+    elif classification == "workout":
+        return handle_workout(user, user_message, stream=stream, context=context)
+    elif classification == "log meal/workout":
+        return handle_logging_request(user, user_message, stream=stream)
+    else:
+        return general(user, user_message, stream=stream)
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def stream_chat(user, user_message, context=None, audio_mode="inline"):
+    """
+    Generator behind the streaming variant of /chat. Forwards text deltas as
+    they arrive, then the ElevenLabs audio chunks, then a final "done" event.
+    """
+    try:
+        events = respond(user, user_message, stream=True, context=context)
+
+        reply_parts = []
+        response_id = None
+        for event in events:
+            if event.type == "response.output_text.delta":
+                reply_parts.append(event.delta)
+                yield sse_event("text", {"delta": event.delta})
+            elif event.type == "response.completed":
+                response_id = event.response.id
+            elif event.type in ("response.failed", "error"):
+                raise RuntimeError("OpenAI request failed")
+
+        if response_id is None:
+            raise RuntimeError("OpenAI request failed")
+
+        reply = "".join(reply_parts)
+
+        record_reply(user["username"], response_id, reply)
+
+        if audio_mode == "inline":
+            for chunk in tts.stream(reply):
+                yield sse_event("audio", {"chunk": base64.b64encode(chunk).decode("utf-8")})
+
+        done = {"reply": reply, "last_message_id": response_id, "reply_id": response_id}
+        if audio_mode == "deferred":
+            done["audio_url"] = url_for("gymbro.reply_audio", reply_id=response_id)
+        yield sse_event("done", done)
+
+    except Exception as err:
+        yield sse_event("error", {"error": str(err)})
     
 
 
+def classify_intent(user, message):
+    """
+    Classifies the message with the in-process classifier and only falls back
+    to the classify_message LLM call when its confidence is too low.
+    """
+    if Config.INTENT_CLASSIFIER != "llm":
+        classification, confidence = classify_local(message, pending_log=bool(user.get("pending_log")))
+        if Config.INTENT_CLASSIFIER == "local" or confidence >= Config.INTENT_CONFIDENCE_THRESHOLD:
+            return classification
+
+    return classify_message(user, message)
+
 def classify_message(user, message):
 
     last_message_id = user.get("last_message_id", "")
@@ -185,7 +300,39 @@ def classify_message(user, message):
     except Exception as e:
         raise RuntimeError("OpenAI request failed") from e
     
-def handle_nutrition(user, message):
+class LogContext:
+    """
+    The user's formatted 7-day meal and workout logs and 4-week training
+    stats. With prefetch=True all three start immediately on
+    context_executor; otherwise each is run on first use.
+    """
+
+    def __init__(self, username, prefetch=False):
+        self.username = username
+        self.meals_future = None
+        self.workouts_future = None
+        self.stats_future = None
+        if prefetch:
+            self.meals_future = context_executor.submit(meal_context, username)
+            self.workouts_future = context_executor.submit(workout_context, username)
+            self.stats_future = context_executor.submit(training_summary, username)
+
+    def meal_logs(self):
+        if self.meals_future is None:
+            return meal_context(self.username)
+        return self.meals_future.result()
+
+    def workout_logs(self):
+        if self.workouts_future is None:
+            return workout_context(self.username)
+        return self.workouts_future.result()
+
+    def training_stats(self):
+        if self.stats_future is None:
+            return training_summary(self.username)
+        return self.stats_future.result()
+
+def handle_nutrition(user, message, stream=False, context=None):
 
     username = user.get("username", "")
     name = user.get("name", "")
@@ -195,27 +342,8 @@ def handle_nutrition(user, message):
     goal = user.get("goal", "")
     last_message_id = user.get("last_message_id", "")
 
-    seven_days_ago = datetime.now() - timedelta(days=7)
-
-    past_seven_days_meals = list(meals.find({ 
-        "username": username, 
-        "meal_date": {"$gte" : seven_days_ago}
-    }))
-
-    meal_logs = ""
-    if past_seven_days_meals:
-        for meal in past_seven_days_meals:
-            meal_type = meal.get("meal_type", "Meal")
-            meal_date = meal.get("meal_date")
-            meal_items = meal.get("meal_items", [])
-            date_str = meal_date.strftime('%Y-%m-%d') if isinstance(meal_date, datetime) else str(meal_date)
-
-            meal_logs += f"- {meal_type} on {date_str}:\n"
-            for item in meal_items:
-                meal_logs += f"  -{item} \n"
-    else:
-        meal_logs = "- No meals logged.\n"
-
+    context = context or LogContext(username)
+    meal_logs = context.meal_logs()
 
     system_instructions = f"""
     You are GymBro, a personal nutrition coach for fitness-oriented users.
@@ -240,7 +368,8 @@ def handle_nutrition(user, message):
                 model="gpt-4o-mini",
                 input=message,
                 instructions=system_instructions,
-                store=True
+                store=True,
+                stream=stream
             )
 
         else:
@@ -249,7 +378,8 @@ def handle_nutrition(user, message):
                 input=message,
                 instructions=system_instructions,
                 previous_response_id=last_message_id,
-                store=True
+                store=True,
+                stream=stream
             )
 
         return response
@@ -258,7 +388,7 @@ def handle_nutrition(user, message):
     except Exception as e:
         raise RuntimeError("OpenAI request failed") from e
 
-def handle_workout(user, message):
+def handle_workout(user, message, stream=False, context=None):
 
     username = user.get("username", "")
     name = user.get("name", "")
@@ -268,36 +398,9 @@ def handle_workout(user, message):
     goal = user.get("goal", "")
     last_message_id = user.get("last_message_id", "")
 
-    seven_days_ago = datetime.now() - timedelta(days=7)
-
-    past_seven_days_workouts = list(workouts.find({ 
-        "username": username, 
-        "workout_date": {"$gte" : seven_days_ago}
-    }))
-
-    workout_logs = ""
-    if past_seven_days_workouts:
-        for workout in past_seven_days_workouts:
-            workout_type = workout.get("workout_type", "Workout")
-            workout_date = workout.get("workout_date")
-            activities = workout.get("workout_activities", [])
-            date_str = workout_date.strftime('%Y-%m-%d') if isinstance(workout_date, datetime) else str(workout_date)
-
-            workout_logs += f"- {workout_type} on {date_str}:\n"
-            for ex in activities:
-                name = ex.get("name", "Exercise")
-                mode = ex.get("mode", "")
-                if mode == "reps":
-                    sets = ex.get("sets", "?")
-                    reps = ex.get("reps", "?")
-                    workout_logs += f"  -{name}: {sets} sets of {reps} reps\n"
-                else:
-                    duration = ex.get("duration", "?")
-                    workout_logs += f"  -{name}: {duration} minutes\n"
-    else:
-        workout_logs = "- No workouts logged.\n"
-
-        
+    context = context or LogContext(username)
+    workout_logs = context.workout_logs()
+    training_stats = context.training_stats()
 
     system_instructions = f"""
     You are GymBro, a personal fitness coach and workout planner.
@@ -312,6 +415,9 @@ def handle_workout(user, message):
     Here is their workout history from the past 7 days:
     {workout_logs}
 
+    Precomputed training stats for the past 4 weeks:
+    {training_stats}
+
     Your responsibilities:
     - If the user is seeking advice, highlight ways they can improve their training—this could include frequency, variety, form, or balancing different muscle groups.
     - If they are asking for a new workout:
@@ -327,7 +433,8 @@ def handle_workout(user, message):
                 model="gpt-4o-mini",
                 input=message,
                 instructions=system_instructions,
-                store=True
+                store=True,
+                stream=stream
             )
 
         else:
@@ -336,7 +443,8 @@ def handle_workout(user, message):
                 input=message,
                 instructions=system_instructions,
                 previous_response_id=last_message_id,
-                store=True
+                store=True,
+                stream=stream
             )
 
         return response
@@ -345,7 +453,7 @@ def handle_workout(user, message):
     except Exception as e:
         raise RuntimeError("OpenAI request failed") from e
 
-def handle_logging_request(user, message):
+def handle_logging_request(user, message, stream=False):
     pending_log = user.get("pending_log")
 
     if pending_log:
@@ -354,13 +462,13 @@ def handle_logging_request(user, message):
             log_data = pending_log.get("data")
 
             if log_type == "meal":
-                return log_meal_from_pending(user, log_data)
+                return log_meal_from_pending(user, log_data, stream=stream)
             elif log_type == "workout":
-                return log_workout_from_pending(user, log_data)
+                return log_workout_from_pending(user, log_data, stream=stream)
         else:
-            return regenerate_proposal(user, message)
+            return regenerate_proposal(user, message, stream=stream)
 
-    return handle_new_logging_message(user, message)
+    return handle_new_logging_message(user, message, stream=stream)
 
 def is_affirmative_confirmation(message):
     try:
@@ -387,10 +495,12 @@ def is_affirmative_confirmation(message):
     except Exception as e:
         raise RuntimeError("LLM confirmation check failed") from e
 
-def handle_new_logging_message(user, message):
-
+def logging_tools():
+    """
+    Function tools used to draft a structured meal or workout log proposal.
+    """
     current_date = datetime.now()
-    tools = [{
+    return [{
         "type": "function",
         "name": "log_user_meal",
         "description": "Logs the user's meal based on what they report eating.",
@@ -473,6 +583,10 @@ def handle_new_logging_message(user, message):
         }
     }]
 
+def handle_new_logging_message(user, message, stream=False):
+
+    tools = logging_tools()
+
     system_instructions = """
         You are GymBro, an AI fitness assistant. 
         Parse the user's message and generate a structured log proposal using one of the available functions, but DO NOT actually log it. 
@@ -532,13 +646,14 @@ def handle_new_logging_message(user, message):
         model="gpt-4o-mini",
         input=input_messages,
         tools=tools,
-        instructions=system_instructions
+        instructions=system_instructions,
+        stream=stream
     )
     
 
     return confirmation_response
 
-def general(user, message):
+def general(user, message, stream=False):
 
     last_message_id = user.get("last_message_id", "")
 
@@ -553,7 +668,8 @@ def general(user, message):
                 model="gpt-4o-mini",
                 input=message,
                 instructions=system_instructions,
-                store=True
+                store=True,
+                stream=stream
             )
 
         else:
@@ -562,7 +678,8 @@ def general(user, message):
                 input=message,
                 instructions=system_instructions,
                 previous_response_id=last_message_id,
-                store=True
+                store=True,
+                stream=stream
             )
 
         return response
@@ -571,8 +688,177 @@ def general(user, message):
     except Exception as e:
         raise RuntimeError("OpenAI request failed") from e
     
-def regenerate_proposal(user, new_message):
-    return handle_new_logging_message(user, new_message)
+confirm_pending_log_tool = {
+    "type": "function",
+    "name": "confirm_pending_log",
+    "description": "Saves the pending log proposal once the user has confirmed it is correct.",
+    "parameters": {
+        "type": "object",
+        "properties": {},
+        "required": [],
+        "additionalProperties": False
+    },
+    "strict": True
+}
+
+def routing_instructions(user, context):
+    name = user.get("name", "")
+    age = user.get("age", "")
+    weight = user.get("weight", "")
+    height = user.get("height", "")
+    goal = user.get("goal", "")
+    pending_log = user.get("pending_log")
+
+    if pending_log:
+        pending_summary = summarize_log_proposal(pending_log.get("type"), pending_log.get("data"))
+        pending_block = f"A log proposal is waiting for the user's confirmation: {pending_summary}"
+    else:
+        pending_block = "There is no log proposal waiting for confirmation."
+
+    return f"""
+    You are GymBro, an AI personal trainer and nutritionist.
+
+    The user is:
+    - Name: {name}
+    - Age: {age}
+    - Weight: {weight} lbs
+    - Height: {height} inches
+    - Goal: {goal}
+
+    Meal logs from the past 7 days:
+    {context.meal_logs()}
+
+    Workout history from the past 7 days:
+    {context.workout_logs()}
+
+    Precomputed training stats for the past 4 weeks:
+    {context.training_stats()}
+
+    {pending_block}
+
+    First decide which category the user's message falls into, then act on it:
+    - "log meal/workout": The user is reporting details of something they *already did*, such as eating a meal or completing a workout, or is answering a pending log proposal.
+        - Call log_user_meal or log_user_workout to draft a structured log proposal. DO NOT say that anything has been saved or logged; summarize the proposal and ask the user to confirm it.
+        - If a proposal is pending and the user confirms it, call confirm_pending_log.
+        - If a proposal is pending and the user corrects it, call log_user_meal or log_user_workout again with the corrected details.
+    - "nutrition": The user is asking for advice, facts, or help related to food, diet, or meal planning.
+        - Based on what the user has recently eaten, provide personalized nutrition advice.
+        - Recommend meals that support their goal, avoiding repetition and ensuring nutritional variety.
+    - "workout": The user is asking for advice, facts, or help related to exercise routines, fitness plans, or training tips.
+        - If they are seeking advice, highlight ways they can improve their training—this could include frequency, variety, form, or balancing different muscle groups.
+        - If they are asking for a new workout, suggest a well-structured session tailored to their goal, avoid overloading muscle groups they’ve trained in the past 1–2 days, promote a balanced routine and be specific with exercises, sets, reps, or duration.
+    - "other": Anything that doesn’t fit into the above. Answer as a helpful personal trainer and nutritionist.
+
+    Only the "log meal/workout" category uses tools; answer every other category directly.
+    """.strip()
+
+def route_message(user, message, stream=False, context=None):
+    """
+    Single round-trip alternative to classify_message followed by a handler.
+    One call both picks the category and answers it, or emits a logging tool
+    call; only tool calls need a second call to turn the tool output into a reply.
+    """
+    last_message_id = user.get("last_message_id", "")
+
+    tools = logging_tools()
+    if user.get("pending_log"):
+        tools.append(confirm_pending_log_tool)
+
+    request_args = {
+        "model": "gpt-4o-mini",
+        "input": message,
+        "instructions": routing_instructions(user, context or LogContext(user["username"], prefetch=True)),
+        "tools": tools,
+        # One logging tool call per turn: complete_routed_tool_call answers
+        # exactly one, and a follow-up missing any call's output is rejected
+        "parallel_tool_calls": False,
+        "store": True
+    }
+    if last_message_id != "":
+        request_args["previous_response_id"] = last_message_id
+
+    if stream:
+        return stream_routed_message(user, request_args)
+
+    try:
+        response = client.responses.create(**request_args)
+
+        tool_call = find_function_call(response)
+        if tool_call is None:
+            return response
+
+        return complete_routed_tool_call(user, response, tool_call, request_args)
+
+    except Exception as e:
+        raise RuntimeError("OpenAI request failed") from e
+
+def stream_routed_message(user, request_args):
+    completed = None
+    for event in client.responses.create(**request_args, stream=True):
+        if event.type == "response.completed":
+            completed = event.response
+        yield event
+
+    tool_call = find_function_call(completed) if completed else None
+    if tool_call is not None:
+        yield from complete_routed_tool_call(user, completed, tool_call, request_args, stream=True)
+
+def find_function_call(response):
+    for item in response.output:
+        if item.type == "function_call":
+            return item
+    return None
+
+def complete_routed_tool_call(user, response, tool_call, request_args, stream=False):
+    """
+    Runs the logging tool the router picked and asks the model to turn its
+    output into the reply shown to the user.
+    """
+    username = user["username"]
+
+    if tool_call.name == "confirm_pending_log":
+        pending_log = user.get("pending_log") or {}
+        log_type = pending_log.get("type")
+        log_data = pending_log.get("data")
+
+        if log_type == "meal":
+            save_pending_meal(username, log_data)
+        elif log_type == "workout":
+            save_pending_workout(username, log_data)
+
+        output = f"Logged successfully: {summarize_log_proposal(log_type, log_data)}"
+    else:
+        args = json.loads(tool_call.arguments)
+        log_type = "meal" if tool_call.name == "log_user_meal" else "workout"
+
+        users.update_one({"username": username}, {
+            "$set": {
+                "pending_log": {
+                    "type": log_type,
+                    "data": args
+                }
+            }
+        })
+
+        output = f"Proposal drafted, NOT logged yet: {summarize_log_proposal(log_type, args)}. Ask the user to confirm it."
+
+    return client.responses.create(
+        model="gpt-4o-mini",
+        input=[{
+            "type": "function_call_output",
+            "call_id": tool_call.call_id,
+            "output": output
+        }],
+        instructions=request_args["instructions"],
+        tools=request_args["tools"],
+        parallel_tool_calls=False,
+        previous_response_id=response.id,
+        store=True,
+        stream=stream
+    )
+
+def regenerate_proposal(user, new_message, stream=False):
+    return handle_new_logging_message(user, new_message, stream=stream)
 
 def convertISOtoDateTimeObject(iso_string):
     return datetime.fromisoformat(iso_string.replace("Z", "+00:00"))
@@ -584,18 +870,21 @@ def summarize_log_proposal(log_type, args):
         exercises = ", ".join(a['name'] for a in args['workout_activities'])
         return f"You did {args['workout_type']} on {args['workout_date']} with: {exercises}"
     
-def log_meal_from_pending(user, data):
-    username = user["username"]
-    last_message_id = user["last_message_id"]
+def save_pending_meal(username, data):
     date = convertISOtoDateTimeObject(data["meal_date"])
-    meals.insert_one({
-        "username": username,
-        "meal_date": date,
-        "meal_type": data["meal_type"],
-        "meal_items": data["meal_items"]
-    })
+    insert_meal(username, date, data["meal_type"], data["meal_items"])
+    users.update_one({"username": username}, {"$unset": {"pending_log": ""}})
+
+def save_pending_workout(username, data):
+    date = convertISOtoDateTimeObject(data["workout_date"])
+    insert_workout(username, date, data["workout_type"], data["workout_activities"], data.get("notes"))
     users.update_one({"username": username}, {"$unset": {"pending_log": ""}})
 
+def log_meal_from_pending(user, data, stream=False):
+    username = user["username"]
+    last_message_id = user["last_message_id"]
+    save_pending_meal(username, data)
+
 
     system_instructions = """
     You are GymBro, an AI personal trainer and nutritionist.
@@ -607,24 +896,16 @@ def log_meal_from_pending(user, data):
         model="gpt-4o-mini",
         instructions=system_instructions,
         previous_response_id=last_message_id,
-        store=True
+        store=True,
+        stream=stream
     )
 
     return response
 
-def log_workout_from_pending(user, data):
+def log_workout_from_pending(user, data, stream=False):
     username = user["username"]
     last_message_id = user["last_message_id"]
-    date = convertISOtoDateTimeObject(data["workout_date"])
-    workouts.insert_one({
-        "username": username,
-        "workout_date": date,
-        "workout_type": data["workout_type"],
-        "workout_activities": data["workout_activities"],
-        "notes": data.get("notes")
-    })
-
-    users.update_one({"username": username}, {"$unset": {"pending_log": ""}})
+    save_pending_workout(username, data)
 
     system_instructions = """
     You are GymBro, an AI personal trainer and nutritionist.
@@ -636,7 +917,8 @@ def log_workout_from_pending(user, data):
         model="gpt-4o-mini",
         instructions=system_instructions,
         previous_response_id=last_message_id,
-        store=True
+        store=True,
+        stream=stream
     )
 
 
@@ -645,6 +927,48 @@ def log_workout_from_pending(user, data):
 
 
 
+@gymbro_bp.route("/audio/<reply_id>", methods=["GET"])
+@jwt_required()
+def reply_audio(reply_id):
+    """
+    Returns the speech for one of the user's recent replies as raw audio.
+    The format is taken from ?format=mp3|opus (or the Accept header) and
+    ?bitrate=<kbps>, e.g. ?format=opus&bitrate=32 for mobile clients.
+    Supports Range and If-None-Match requests.
+    """
+    username = get_jwt_identity()
+    user = users.find_one(
+        {"username": username, "recent_replies.id": reply_id},
+        {"recent_replies.$": 1}
+    )
+    if not user:
+        return jsonify({"error": "Reply not found"}), 404
+
+    try:
+        output_format, mimetype = tts.negotiate_format(
+            request.args.get("format"),
+            request.args.get("bitrate", type=int),
+            request.accept_mimetypes
+        )
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 406
+
+    text = user["recent_replies"][0]["text"]
+    audio = tts.synthesize(text, output_format=output_format)
+
+    response = Response(audio, mimetype=mimetype)
+    response.set_etag(tts.cache_key(text, output_format=output_format))
+    response.cache_control.private = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(audio))
+
+
+@gymbro_bp.route("/tts/stats", methods=["GET"])
+@jwt_required()
+def tts_cache_stats():
+    return jsonify(tts.cache_stats())
+
+
 @gymbro_bp.route("/reset", methods=["POST"])
 @jwt_required()
 def reset_gymbro():
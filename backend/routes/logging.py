@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.db import get_meal_collection, get_workout_collection
-from datetime import datetime
+from services.logs import insert_meal, insert_workout, logs_page
+from services.storage import find_logs
+from services import summaries, versions
+from services.bulk_import import import_logs, export_ndjson, export_csv
+from datetime import datetime, timedelta
 
 logging_bp = Blueprint("logging", __name__)
-meals = get_meal_collection()
-workouts = get_workout_collection()
 
 def convertISOtoDateTimeObject(iso_string):
     return datetime.fromisoformat(iso_string.replace("Z", "+00:00"))
@@ -24,7 +25,7 @@ def log_meal():
     if not date or not items:
         return jsonify({"error": "Date and items are required"}), 400
 
-    meals.insert_one({ "username": username, "meal_date": date, "meal_type": type, "meal_items": items })
+    insert_meal(username, date, type, items)
     return jsonify({ "msg": "Meal logged successfully" }), 201
 
 @logging_bp.route("/workout", methods=["POST"])
@@ -41,11 +42,60 @@ def log_workout():
     if not date or not activities:
         return jsonify({"error": "Date and activities are required"}), 400
 
-    workouts.insert_one({ "username": username, "workout_date": date, "workout_type": type, "workout_activities": activities, "notes": notes })
+    insert_workout(username, date, type, activities, notes)
     return jsonify({ "msg": "Workout logged successfully" }), 201
 
+@logging_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_import():
+    """
+    Imports many meals and workouts from a streamed request body:
+    NDJSON (application/x-ndjson, the default) or CSV (text/csv or ?format=csv).
+    See services/bulk_import.py for the record format.
+
+    Returns {"inserted": n, "failed": n, "errors": [{"line": n, "error": "..."}], "errors_truncated": bool}
+    """
+    username = get_jwt_identity()
+
+    fmt = request.args.get("format")
+    if fmt is None:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    # Lines that are too long or not UTF-8 are reported per line like any
+    # other invalid record, since earlier batches are already committed
+    result = import_logs(username, request.stream, fmt)
+    return jsonify(result.to_dict()), 200
+
+@logging_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_logs():
+    """
+    Streams the user's full meal and workout history, oldest first, as
+    NDJSON (default) or CSV (?format=csv) in the format /bulk accepts.
+    """
+    username = get_jwt_identity()
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt == "ndjson":
+        body, mimetype = export_ndjson(username), "application/x-ndjson"
+    elif fmt == "csv":
+        body, mimetype = export_csv(username), "text/csv"
+    else:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=gymbro-logs.{fmt}"}
+    )
+
+# ETag-conditional on the user's data version (services/versions.py): a write
+# made in another worker can go unseen, even by a 304, for up to DATA_VERSION_TTL
 @logging_bp.route("/by-date", methods=["GET"])
 @jwt_required()
+@versions.conditional()
 def logs_by_date():
     username = get_jwt_identity()
     date_str = request.args.get("date")
@@ -54,20 +104,14 @@ def logs_by_date():
         # Specific date: return meals and workouts
         try:
             start = datetime.fromisoformat(date_str)
-            end = start.replace(hour=23, minute=59, second=59)
+            end = start + timedelta(days=1)
         except:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
 
-        meals_logged = list(meals.find({
-            "username": username,
-            "meal_date": {"$gte": start, "$lte": end}
-        }, {"_id": 0}))
+        meals_logged = list(find_logs("meals", username, start, end, {"_id": 0}))
 
-        workouts_logged = list(workouts.find({
-            "username": username,
-            "workout_date": {"$gte": start, "$lte": end}
-        }, {"_id": 0}))
+        workouts_logged = list(find_logs("workouts", username, start, end, {"_id": 0}))
 
         # Flatten for frontend
         formatted_meals = [
@@ -81,22 +125,75 @@ def logs_by_date():
         return jsonify({ "meals": formatted_meals, "workouts": formatted_workouts })
 
     else:
-        # No date: return highlights for calendar
-        all_meals = meals.find({"username": username}, {"meal_date": 1})
-        all_workouts = workouts.find({"username": username}, {"workout_date": 1})
+        # No date: return highlights for calendar, optionally limited to
+        # ?month=YYYY-MM or ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)
+        try:
+            start, end = parse_window(request.args)
+        except ValueError:
+            return jsonify({"error": "Invalid window. Use month=YYYY-MM or start/end=YYYY-MM-DD"}), 400
 
-        highlights = {}
+        return jsonify(summaries.highlights(username, start, end))
 
-        for m in all_meals:
-            key = to_date_string(m["meal_date"])
-            if key not in highlights:
-                highlights[key] = {}
-            highlights[key]["meals"] = True
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-        for w in all_workouts:
-            key = to_date_string(w["workout_date"])
-            if key not in highlights:
-                highlights[key] = {}
-            highlights[key]["workouts"] = True
+@logging_bp.route("/range", methods=["GET"])
+@jwt_required()
+def logs_in_range():
+    """
+    Meals and workouts between ?start=YYYY-MM-DD and ?end=YYYY-MM-DD
+    (inclusive), grouped by day, oldest first.
+
+    Paginated with ?limit (default 50, max 200) entries per page; pass the
+    returned "next_cursor" back as ?cursor to get the following page. A day
+    can continue onto the next page.
+    """
+    username = get_jwt_identity()
 
-        return jsonify(highlights)
\ No newline at end of file
+    try:
+        start, end = parse_window(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if not start or not end:
+        return jsonify({"error": "start and end are required"}), 400
+
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    try:
+        entries, next_cursor = logs_page(username, start, end, limit, request.args.get("cursor"))
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    days = []
+    for kind, doc in entries:
+        if kind == "meals":
+            date = doc["meal_date"]
+            entry = { "id": str(doc["_id"]), "time": date.isoformat(), "category": doc.get("meal_type"), "items": doc.get("meal_items", []) }
+        else:
+            date = doc["workout_date"]
+            entry = { "id": str(doc["_id"]), "time": date.isoformat(), "type": doc.get("workout_type"), "activities": doc.get("workout_activities", []), "notes": doc.get("notes") }
+
+        key = to_date_string(date)
+        if not days or days[-1]["date"] != key:
+            days.append({ "date": key, "meals": [], "workouts": [] })
+        days[-1][kind].append(entry)
+
+    return jsonify({ "days": days, "next_cursor": next_cursor })
+
+def parse_window(args):
+    """
+    Returns (start, end) datetimes with `end` exclusive, or (None, None).
+    """
+    month = args.get("month")
+    if month:
+        start = datetime.strptime(month, "%Y-%m")
+        end = (start + timedelta(days=32)).replace(day=1)
+        return start, end
+
+    start = args.get("start")
+    end = args.get("end")
+    start = datetime.fromisoformat(start) if start else None
+    end = datetime.fromisoformat(end) + timedelta(days=1) if end else None
+    return start, end
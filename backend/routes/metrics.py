@@ -0,0 +1,37 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from services.db import pool_stats
+from services import embeddings, retrieval
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.route("/pool", methods=["GET"])
+@jwt_required()
+def mongo_pool_stats():
+    """
+    Mongo connection pool usage for the worker process that served the
+    request: connections checked out now and at peak, and how long checkouts
+    waited for a free connection. Sustained waits or a peak at max_pool_size
+    mean the pool (or the worker's concurrency) needs resizing.
+    """
+    return jsonify(pool_stats())
+
+
+@metrics_bp.route("/embeddings", methods=["GET"])
+@jwt_required()
+def embedding_cache_stats():
+    """
+    Hit rates of the /pinecone/query embedding cache tiers in this worker,
+    with average lookup and API latencies and the time hits have saved.
+    """
+    return jsonify(embeddings.cache_stats())
+
+
+@metrics_bp.route("/retrieval", methods=["GET"])
+@jwt_required()
+def retrieval_stats():
+    """
+    How /pinecone/query answers were found in this worker, including the
+    share served by the keyword fast path with no embedding or vector call.
+    """
+    return jsonify(retrieval.retrieval_stats())
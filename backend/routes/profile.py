@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.db import get_user_collection, get_meal_collection, get_workout_collection
+from services.db import get_user_collection
+from services import versions
+from services.storage import count_logs
+from services.nutrition import nutrition_summary
+from services.analytics import training_analytics, DEFAULT_WEEKS, MAX_WEEKS
 from datetime import datetime, timedelta
 
 profile_bp = Blueprint("profile", __name__)
 users = get_user_collection()
-meals = get_meal_collection()
-workouts = get_workout_collection()
+
+# The GET endpoints here are ETag-conditional on the user's data version
+# (services/versions.py), which is cached per worker: a write made in another
+# worker can go unseen, even by a 304, for up to DATA_VERSION_TTL.
 
 @profile_bp.route("/goal", methods=["POST"])
 @jwt_required()
@@ -21,19 +27,23 @@ def set_goal():
         { "username": username },
         { "$set": { "goal": goal_text } }
     )
+    versions.bump(username)
     return jsonify({ "msg": "Goal updated" }), 200
 
 @profile_bp.route("/", methods=["GET"])
 @jwt_required()
+@versions.conditional()
 def get_profile():
     username = get_jwt_identity()
-    user = users.find_one({ "username": username }, { "_id": 0, "password_hash": 0 })
+    # Chat state changes every turn and is not part of the profile
+    user = users.find_one({ "username": username }, { "_id": 0, "password_hash": 0, "last_message_id": 0, "pending_log": 0, "recent_replies": 0, "data_version": 0 })
     if not user:
         return jsonify({ "error": "User not found" }), 404
     return jsonify(user), 200
 
 @profile_bp.route("/stats", methods=["GET"])
 @jwt_required()
+@versions.conditional(daily=True)
 def get_user_stats():
     username = get_jwt_identity()
     user = users.find_one({"username": username}, {"_id": 0})
@@ -43,18 +53,48 @@ def get_user_stats():
 
     thirty_days_ago = datetime.now() - timedelta(days=30)
 
-    meal_count = meals.count_documents({
-        "username": username,
-        "meal_date": {"$gte": thirty_days_ago}
-    })
+    meal_count = count_logs("meals", username, start=thirty_days_ago)
 
-    workout_count = workouts.count_documents({
-        "username": username,
-        "workout_date": {"$gte": thirty_days_ago}
-    })
+    workout_count = count_logs("workouts", username, start=thirty_days_ago)
 
     return jsonify({
         **{k: user.get(k) for k in ["name", "age", "height", "weight", "goal"]},
         "past30Meals": meal_count,
         "past30Workouts": workout_count
-    })
\ No newline at end of file
+    })
+
+MAX_NUTRITION_DAYS = 90
+
+@profile_bp.route("/nutrition", methods=["GET"])
+@jwt_required()
+@versions.conditional(daily=True)
+def get_nutrition():
+    """
+    Calories and macros for the last ?days=N days (default 7, max 90)
+    including today: per day, per Monday-based week, totals and the average
+    over days with meals. Served from the daily summaries, no LLM involved.
+    """
+    username = get_jwt_identity()
+    days = request.args.get("days", 7, type=int)
+    if days < 1 or days > MAX_NUTRITION_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_NUTRITION_DAYS}"}), 400
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+    return jsonify(nutrition_summary(username, start, days))
+
+@profile_bp.route("/analytics", methods=["GET"])
+@jwt_required()
+@versions.conditional(daily=True)
+def get_training_analytics():
+    """
+    Training volume for the last ?weeks=N Monday-based weeks (default 8, max
+    52): per-week and per-exercise sets/rep volume/minutes with trends, and
+    how often each muscle group was trained.
+    """
+    username = get_jwt_identity()
+    weeks = request.args.get("weeks", DEFAULT_WEEKS, type=int)
+    if weeks < 1 or weeks > MAX_WEEKS:
+        return jsonify({"error": f"weeks must be between 1 and {MAX_WEEKS}"}), 400
+
+    return jsonify(training_analytics(username, weeks))
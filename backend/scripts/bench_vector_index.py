@@ -0,0 +1,98 @@
+"""
+Latency and recall of the vector search backends behind /pinecone/query.
+
+Usage (from backend/):
+    python -m scripts.bench_vector_index [--queries data/rag_queries.txt] [--top-k 3] [--runs 5] [--backends pinecone,local]
+
+Query embeddings are fetched once up front (through the embedding cache) and
+are not timed. The local index is measured with exact search and, when the
+build wrote one and hnswlib is installed, with the HNSW graph. Recall@k is
+measured against Pinecone when it's benchmarked, otherwise against exact
+local search.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from services.embeddings import embed_query
+from services.vector_index import local_index, query_pinecone
+
+DEFAULT_QUERIES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "rag_queries.txt")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def searchers(backends, top_k):
+    found = {}
+    if "pinecone" in backends:
+        found["pinecone"] = lambda vector: query_pinecone(vector, top_k)
+    if "local" in backends:
+        index = local_index()
+        found["local-exact"] = lambda vector: index.search(vector, top_k, exact=True)
+        if index.graph is not None:
+            found["local-hnsw"] = lambda vector: index.search(vector, top_k)
+        print(f"Local index: {index.count} {index.meta['dtype']} vectors, dim {index.dim}")
+    return found
+
+
+def benchmark(vectors, search, runs):
+    """
+    Per-query latencies in ms over `runs` passes (after one warm-up pass),
+    and the result IDs of the last pass.
+    """
+    for vector in vectors:
+        search(vector)
+
+    latencies = []
+    results = []
+    for _ in range(runs):
+        results = []
+        for vector in vectors:
+            start = time.perf_counter()
+            matches = search(vector)
+            latencies.append((time.perf_counter() - start) * 1e3)
+            results.append([match["id"] for match in matches])
+    return latencies, results
+
+
+def recall(results, reference):
+    hits = sum(len(set(got) & set(expected)) for got, expected in zip(results, reference))
+    total = sum(len(expected) for expected in reference)
+    return hits / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vector search backends.")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES_PATH)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backends", default="pinecone,local", help="Comma-separated: pinecone, local")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    vectors = [embed_query(query) for query in queries]
+    found = searchers(args.backends.split(","), args.top_k)
+
+    measured = {name: benchmark(vectors, search, args.runs) for name, search in found.items()}
+    reference_name = "pinecone" if "pinecone" in measured else "local-exact"
+    reference = measured[reference_name][1]
+
+    print(f"\n{len(queries)} queries x {args.runs} runs, top {args.top_k}; recall against {reference_name}")
+    print("Backend         mean ms   p50 ms   p95 ms   max ms   recall")
+    for name, (latencies, results) in measured.items():
+        print(f"{name:<14} {statistics.mean(latencies):>8.2f} {percentile(latencies, 50):>8.2f} "
+              f"{percentile(latencies, 95):>8.2f} {max(latencies):>8.2f} {recall(results, reference):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Offline evaluation of the local intent classifier.
+
+Usage (from backend/):
+    python -m scripts.eval_intent [--data data/intent_eval.jsonl] [--threshold 0.8] [--llm]
+
+Reports accuracy, per-label precision/recall, latency, and how many messages
+would be answered locally vs. fall back to the LLM at the given threshold.
+--llm also runs the remote classify_message on the fallback set (needs API keys).
+"""
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+
+from config import Config
+from services.intent import LABELS, classify_local, load_labelled_messages
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "intent_eval.jsonl")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def evaluate(examples, threshold, use_llm=False):
+    results = []
+    latencies = []
+
+    for example in examples:
+        start = time.perf_counter()
+        label, confidence = classify_local(example["message"], pending_log=example.get("pending_log", False))
+        latencies.append((time.perf_counter() - start) * 1e6)
+        results.append((example, label, confidence))
+
+    total = len(results)
+    correct = sum(1 for example, label, _ in results if label == example["label"])
+    confident = [(example, label) for example, label, confidence in results if confidence >= threshold]
+    confident_correct = sum(1 for example, label in confident if label == example["label"])
+
+    print(f"Messages:            {total}")
+    print(f"Local accuracy:      {correct / total:.1%}")
+    print(f"Answered locally:    {len(confident)} ({len(confident) / total:.1%}) at threshold {threshold}")
+    if confident:
+        print(f"Accuracy (local):    {confident_correct / len(confident):.1%}")
+    print(f"Latency (us):        mean {statistics.mean(latencies):.1f}  "
+          f"p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  max {max(latencies):.1f}")
+
+    print("\nLabel                precision  recall")
+    predicted = Counter(label for _, label, _ in results)
+    expected = Counter(example["label"] for example, _, _ in results)
+    for name in LABELS:
+        hits = sum(1 for example, label, _ in results if label == name and example["label"] == name)
+        precision = hits / predicted[name] if predicted[name] else 0.0
+        recall = hits / expected[name] if expected[name] else 0.0
+        print(f"{name:<20} {precision:>9.1%}  {recall:>6.1%}")
+
+    misses = [(example, label, confidence) for example, label, confidence in results if label != example["label"]]
+    if misses:
+        print("\nMisclassified:")
+        for example, label, confidence in misses:
+            print(f"  [{confidence:.2f}] {example['message']!r}: expected {example['label']!r}, got {label!r}")
+
+    if use_llm:
+        from routes.gymbro import classify_message
+
+        fallback = [example for example, _, confidence in results if confidence < threshold]
+        hybrid_correct = confident_correct
+        llm_latencies = []
+        for example in fallback:
+            start = time.perf_counter()
+            label = classify_message({"last_message_id": ""}, example["message"])
+            llm_latencies.append((time.perf_counter() - start) * 1e3)
+            hybrid_correct += label == example["label"]
+
+        print(f"\nHybrid accuracy:     {hybrid_correct / total:.1%}")
+        if llm_latencies:
+            print(f"LLM latency (ms):    mean {statistics.mean(llm_latencies):.0f}  p95 {percentile(llm_latencies, 95):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--threshold", type=float, default=Config.INTENT_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--llm", action="store_true", help="Also run the LLM fallback on low-confidence messages")
+    args = parser.parse_args()
+
+    evaluate(load_labelled_messages(args.data), args.threshold, use_llm=args.llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Training-volume analytics over a user's workout_activities.
+
+Workouts in the window are flattened into one row per activity and held as
+columnar numpy arrays (day offset, exercise id, muscle group id, sets, reps,
+minutes), so per-exercise and per-week volume, trends and muscle-group
+frequency are a few array reductions instead of a loop over documents.
+
+Volume is counted as sets x reps for rep-based activities and minutes for
+timed ones; activities don't record load. Results are cached per user and
+window, keyed on the user's data version, so a new log invalidates them.
+"""
+import re
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config
+from services.cache import LRUCache
+from services.storage import find_logs
+from services import versions
+
+# Keyword (matched against the exercise name) -> muscle group. First match wins,
+# so more specific keywords come first.
+MUSCLE_GROUPS = [
+    ("row machine", "cardio"), ("rowing machine", "cardio"), ("rower", "cardio"), ("rowing", "cardio"),
+    ("romanian deadlift", "hamstrings"), ("rdl", "hamstrings"), ("leg curl", "hamstrings"), ("hamstring", "hamstrings"),
+    ("leg extension", "legs"), ("leg press", "legs"), ("back extension", "back"),
+    ("lateral raise", "shoulders"), ("overhead press", "shoulders"), ("shoulder", "shoulders"), ("military", "shoulders"),
+    ("face pull", "shoulders"), ("arnold", "shoulders"),
+    ("tricep", "triceps"), ("skull", "triceps"), ("skullcrusher", "triceps"), ("pushdown", "triceps"),
+    ("deadlift", "back"), ("pull up", "back"), ("pullup", "back"), ("chin up", "back"), ("chinup", "back"), ("row", "back"),
+    ("lat", "back"), ("pulldown", "back"),
+    ("bench", "chest"), ("chest", "chest"), ("push up", "chest"), ("pushup", "chest"), ("fly", "chest"), ("flies", "chest"),
+    ("dip", "chest"),
+    ("curl", "biceps"), ("bicep", "biceps"),
+    ("extension", "triceps"),
+    ("squat", "legs"), ("lunge", "legs"), ("leg", "legs"), ("calf", "legs"), ("calves", "legs"), ("step up", "legs"),
+    ("hip thrust", "glutes"), ("glute", "glutes"), ("abduction", "glutes"), ("abductor", "glutes"),
+    ("plank", "core"), ("crunch", "core"), ("sit up", "core"), ("situp", "core"), ("ab", "core"), ("core", "core"),
+    ("run", "cardio"), ("running", "cardio"), ("jog", "cardio"), ("jogging", "cardio"), ("cycle", "cardio"),
+    ("cycling", "cardio"), ("bike", "cardio"), ("biking", "cardio"), ("swim", "cardio"), ("swimming", "cardio"),
+    ("elliptical", "cardio"), ("walk", "cardio"), ("walking", "cardio"), ("hiit", "cardio"), ("jump rope", "cardio"),
+    ("stair", "cardio")
+]
+# Whole words only, plus a plural: "dips" is chest but "lateral" isn't "lat"
+MUSCLE_PATTERNS = [(re.compile(rf"\b{keyword}(?:e?s)?\b"), group) for keyword, group in MUSCLE_GROUPS]
+GROUPS = sorted({group for _, group in MUSCLE_GROUPS} | {"other"})
+
+DEFAULT_WEEKS = 8
+MAX_WEEKS = 52
+
+# Relative change in weekly volume (per week, against the mean) that counts as a trend
+TREND_THRESHOLD = 0.05
+
+cache = LRUCache(Config.ANALYTICS_CACHE_USERS)
+
+
+def exercise_name(name):
+    return " ".join(re.findall(r"[a-z0-9]+", str(name or "").lower())) or "exercise"
+
+
+def muscle_group(name):
+    for pattern, group in MUSCLE_PATTERNS:
+        if pattern.search(name):
+            return group
+    return "other"
+
+
+def number(value):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def load_columns(username, start, end):
+    """
+    One row per activity logged in [start, end), as parallel arrays.
+    """
+    day, names, sets, reps, minutes = [], [], [], [], []
+    for workout in find_logs("workouts", username, start, end, fields={"_id": 0, "workout_date": 1, "workout_activities": 1}):
+        offset = (workout["workout_date"] - start).days
+        for activity in workout.get("workout_activities") or []:
+            if not isinstance(activity, dict):
+                continue
+            day.append(offset)
+            names.append(exercise_name(activity.get("name")))
+            if activity.get("mode") == "reps":
+                sets.append(number(activity.get("sets")) or 1.0)
+                reps.append(number(activity.get("reps")))
+                minutes.append(0.0)
+            else:
+                sets.append(0.0)
+                reps.append(0.0)
+                minutes.append(number(activity.get("duration")))
+
+    exercises, exercise_ids = np.unique(np.array(names, dtype=str), return_inverse=True)
+    exercise_ids = exercise_ids.astype(np.int64).reshape(-1)
+    exercise_groups = np.array([GROUPS.index(muscle_group(name)) for name in exercises], dtype=np.int64)
+    return {
+        "day": np.array(day, dtype=np.int64),
+        "exercise": exercise_ids,
+        "exercises": exercises,
+        "exercise_groups": exercise_groups,
+        "group": exercise_groups[exercise_ids],
+        "sets": np.array(sets),
+        "volume": np.array(sets) * np.array(reps),
+        "minutes": np.array(minutes)
+    }
+
+
+def slopes(matrix):
+    """
+    Least-squares slope of each row of `matrix` against its column index.
+    """
+    x = np.arange(matrix.shape[1], dtype=float)
+    x -= x.mean()
+    denominator = (x ** 2).sum()
+    if denominator == 0:
+        return np.zeros(matrix.shape[0])
+    return ((matrix - matrix.mean(axis=1, keepdims=True)) * x).sum(axis=1) / denominator
+
+
+def trend_labels(matrix):
+    means = matrix.mean(axis=1)
+    relative = np.divide(slopes(matrix), means, out=np.zeros(len(means)), where=means > 0)
+    return np.where(relative > TREND_THRESHOLD, "up", np.where(relative < -TREND_THRESHOLD, "down", "flat")), relative
+
+
+def compute(username, weeks, today):
+    # Whole Monday-to-Sunday weeks, the last one containing today
+    start = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    n_days = weeks * 7
+    columns = load_columns(username, start, start + timedelta(days=n_days))
+    week = columns["day"] // 7
+    n_exercises = len(columns["exercises"])
+    n_groups = len(GROUPS)
+
+    # Exercise x week grids of rep volume and minutes
+    volume_grid = np.zeros((n_exercises, weeks))
+    minutes_grid = np.zeros((n_exercises, weeks))
+    np.add.at(volume_grid, (columns["exercise"], week), columns["volume"])
+    np.add.at(minutes_grid, (columns["exercise"], week), columns["minutes"])
+
+    # Which days each exercise and muscle group was trained
+    exercise_days = np.zeros((n_exercises, n_days), dtype=bool)
+    exercise_days[columns["exercise"], columns["day"]] = True
+    group_days = np.zeros((n_groups, n_days), dtype=bool)
+    group_days[columns["group"], columns["day"]] = True
+    trained_days = group_days.any(axis=0)
+
+    sets_total = np.bincount(columns["exercise"], weights=columns["sets"], minlength=n_exercises)
+    sessions = exercise_days.sum(axis=1)
+    last_day = np.where(exercise_days.any(axis=1), n_days - 1 - np.argmax(exercise_days[:, ::-1], axis=1), -1)
+    # The current week is only partly over, so trends are fit on the
+    # completed weeks; its low early-week volume would read as a decline
+    completed = slice(0, weeks - 1) if weeks > 1 else slice(0, weeks)
+    trends, relative = trend_labels((volume_grid + minutes_grid)[:, completed])
+
+    order = np.argsort(-(volume_grid.sum(axis=1) + minutes_grid.sum(axis=1)), kind="stable")
+    today_offset = (today - start).days
+
+    def date_of(offset):
+        return (start + timedelta(days=int(offset))).strftime("%Y-%m-%d")
+
+    exercises = [
+        {
+            "name": str(columns["exercises"][i]),
+            "muscle_group": GROUPS[int(columns["exercise_groups"][i])],
+            "sessions": int(sessions[i]),
+            "sets": round(float(sets_total[i]), 1),
+            "volume": round(float(volume_grid[i].sum()), 1),
+            "minutes": round(float(minutes_grid[i].sum()), 1),
+            "weekly_volume": [round(float(v), 1) for v in volume_grid[i]],
+            "weekly_minutes": [round(float(v), 1) for v in minutes_grid[i]],
+            "trend": str(trends[i]),
+            "trend_per_week": round(float(relative[i]), 3),
+            "last_trained": date_of(last_day[i])
+        }
+        for i in order
+    ]
+
+    group_last = np.where(group_days.any(axis=1), n_days - 1 - np.argmax(group_days[:, ::-1], axis=1), -1)
+    muscle_groups = [
+        {
+            "name": GROUPS[g],
+            "days_trained": int(group_days[g].sum()),
+            "days_per_week": round(float(group_days[g].sum()) / weeks, 2),
+            "last_trained": date_of(group_last[g]),
+            "days_since": int(today_offset - group_last[g])
+        }
+        for g in np.argsort(-group_days.sum(axis=1), kind="stable")
+        if group_days[g].any()
+    ]
+
+    weekly_days = trained_days.reshape(weeks, 7).sum(axis=1)
+    weekly_volume = volume_grid.sum(axis=0)
+    weekly_minutes = minutes_grid.sum(axis=0)
+    weekly_sets = np.bincount(week, weights=columns["sets"], minlength=weeks)
+    overall_trends, overall_relative = trend_labels(np.vstack([weekly_volume, weekly_minutes])[:, completed])
+
+    return {
+        "start": start.strftime("%Y-%m-%d"),
+        "weeks": [
+            {
+                "week_start": date_of(7 * w),
+                "training_days": int(weekly_days[w]),
+                "sets": round(float(weekly_sets[w]), 1),
+                "volume": round(float(weekly_volume[w]), 1),
+                "minutes": round(float(weekly_minutes[w]), 1)
+            }
+            for w in range(weeks)
+        ],
+        "volume_trend": str(overall_trends[0]),
+        "volume_trend_per_week": round(float(overall_relative[0]), 3),
+        "minutes_trend": str(overall_trends[1]),
+        "minutes_trend_per_week": round(float(overall_relative[1]), 3),
+        "exercises": exercises,
+        "muscle_groups": muscle_groups
+    }
+
+
+def training_analytics(username, weeks=DEFAULT_WEEKS):
+    """
+    Per-week and per-exercise volume, trends and muscle-group frequency for
+    the user's last `weeks` weeks. Cached until the user logs something new
+    or the day changes.
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    version = versions.current_version(username)
+    key = (username, weeks)
+
+    cached = cache.get(key)
+    if cached is not None and cached[0] == (version, today):
+        return cached[1]
+
+    result = compute(username, weeks, today)
+    cache.put(key, ((version, today), result))
+    return result
+
+
+def training_summary(username, weeks=4):
+    """
+    A few lines of precomputed stats for coaching prompts.
+    """
+    stats = training_analytics(username, weeks)
+    if not stats["exercises"]:
+        return f"- No workouts logged in the past {weeks} weeks.\n"
+
+    weekly = ", ".join(
+        f"{week['training_days']}d/{week['volume']:.0f} reps/{week['minutes']:.0f} min" for week in stats["weeks"]
+    )
+    groups = ", ".join(
+        f"{group['name']} {group['days_trained']}x (last {group['days_since']}d ago)" for group in stats["muscle_groups"]
+    )
+    top = ", ".join(
+        f"{ex['name']} {ex['sessions']}x {ex['trend']}" for ex in stats["exercises"][:6]
+    )
+    return (
+        f"- Weekly (oldest first, last one in progress, days/rep volume/minutes): {weekly}; "
+        f"over completed weeks rep volume {stats['volume_trend']}, minutes {stats['minutes_trend']}\n"
+        f"- Muscle groups (days trained, last trained): {groups}\n"
+        f"- Top exercises (sessions, volume trend): {top}\n"
+    )
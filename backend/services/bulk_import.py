@@ -0,0 +1,299 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from config import Config
+from services.logs import insert_batch, iter_logs
+
+# Streaming import and export of historical meals and workouts. On import,
+# records are parsed and validated one line at a time and written in
+# unordered batches, so only one batch per kind is ever held in memory.
+# Export writes the same record format straight from Mongo cursors, so an
+# export can be re-imported as is.
+#
+# NDJSON, one record per line:
+#   {"kind": "meal", "date": "2024-03-01T08:00:00Z", "type": "breakfast", "items": ["2 eggs", "toast"]}
+#   {"kind": "workout", "date": "2024-03-01T17:00:00Z", "type": "push day",
+#    "activities": [{"name": "bench press", "mode": "reps", "sets": 3, "reps": 10}], "notes": ""}
+#
+# CSV, with a header row:
+#   kind,date,type,items,activities,notes
+#   meal,2024-03-01T08:00:00Z,breakfast,2 eggs;toast,,
+#   workout,2024-03-01T17:00:00Z,push day,,"[{""name"": ""bench press"", ""mode"": ""reps"", ""sets"": 3, ""reps"": 10}]",
+
+READ_CHUNK_BYTES = 64 * 1024
+CSV_COLUMNS = ["kind", "date", "type", "items", "activities", "notes"]
+
+
+def iter_lines(stream, max_bytes):
+    """
+    Yields each line of a binary stream as bytes (with its newline) without
+    reading the whole body. A line longer than max_bytes is skipped and
+    yields None instead, so nothing larger is ever buffered.
+    """
+    pending = bytearray()
+    skipping = False
+    while chunk := stream.read(READ_CHUNK_BYTES):
+        start = 0
+        # Only the new chunk is searched, so long lines cost linear time
+        while (end := chunk.find(b"\n", start)) != -1:
+            if skipping or len(pending) + end + 1 - start > max_bytes:
+                yield None
+                skipping = False
+            else:
+                pending += chunk[start:end + 1]
+                yield bytes(pending)
+            pending.clear()
+            start = end + 1
+
+        if not skipping:
+            if len(pending) + len(chunk) - start > max_bytes:
+                pending.clear()
+                skipping = True
+            else:
+                pending += chunk[start:]
+
+    if skipping:
+        yield None
+    elif pending:
+        yield bytes(pending)
+
+
+def decoded_lines(stream):
+    """
+    Yields (line_number, text, error) per line; text is None when the line
+    is too long or isn't UTF-8, and error says which.
+    """
+    for line_number, line in enumerate(iter_lines(stream, Config.BULK_MAX_LINE_BYTES), start=1):
+        if line is None:
+            yield line_number, None, f"Line longer than {Config.BULK_MAX_LINE_BYTES} bytes"
+            continue
+        try:
+            yield line_number, line.decode("utf-8"), None
+        except UnicodeDecodeError:
+            yield line_number, None, "Line is not valid UTF-8"
+
+
+def ndjson_records(stream):
+    for line_number, line, line_error in decoded_lines(stream):
+        if line_error:
+            yield line_number, None, line_error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def csv_records(stream):
+    line_errors = []
+
+    def text_lines():
+        for line_number, line, line_error in decoded_lines(stream):
+            if line_error:
+                # Reported after the row being read; a blank line keeps the reader's line count in step
+                line_errors.append((line_number, line_error))
+                yield "\n"
+            else:
+                yield line
+
+    reader = csv.DictReader(text_lines())
+    if reader.fieldnames is None or "kind" not in reader.fieldnames or "date" not in reader.fieldnames:
+        yield 1, None, f"CSV header must include: {', '.join(CSV_COLUMNS)}"
+        return
+
+    for row in reader:
+        while line_errors:
+            line_number, line_error = line_errors.pop(0)
+            yield line_number, None, line_error
+
+        record = {"kind": row.get("kind"), "date": row.get("date"), "type": row.get("type") or None, "notes": row.get("notes") or None}
+        if row.get("items"):
+            record["items"] = [item.strip() for item in row["items"].split(";") if item.strip()]
+        if row.get("activities"):
+            try:
+                record["activities"] = json.loads(row["activities"])
+            except json.JSONDecodeError as e:
+                yield reader.line_num, None, f"Invalid activities JSON: {e.msg}"
+                continue
+        yield reader.line_num, record, None
+
+    for line_number, line_error in line_errors:
+        yield line_number, None, line_error
+
+
+def parse_date(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError("date is required")
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'. Use ISO 8601")
+
+
+def validate_activity(activity):
+    if not isinstance(activity, dict) or not isinstance(activity.get("name"), str) or not activity["name"]:
+        raise ValueError("each activity needs a name")
+    if activity.get("mode") not in ("reps", "time"):
+        raise ValueError("activity mode must be 'reps' or 'time'")
+
+
+def to_document(username, record):
+    """
+    Validates one record and returns (kind, document) in the same shape the
+    single-entry endpoints store. Raises ValueError with a user-facing message.
+    """
+    kind = record.get("kind")
+    date = parse_date(record.get("date"))
+
+    if kind == "meal":
+        items = record.get("items")
+        if not isinstance(items, list) or not items or not all(isinstance(item, str) for item in items):
+            raise ValueError("items must be a non-empty list of strings")
+        return "meals", {
+            "username": username,
+            "meal_date": date,
+            "meal_type": record.get("type"),
+            "meal_items": items
+        }
+
+    if kind == "workout":
+        activities = record.get("activities")
+        if not isinstance(activities, list) or not activities:
+            raise ValueError("activities must be a non-empty list")
+        for activity in activities:
+            validate_activity(activity)
+        return "workouts", {
+            "username": username,
+            "workout_date": date,
+            "workout_type": record.get("type"),
+            "workout_activities": activities,
+            "notes": record.get("notes")
+        }
+
+    raise ValueError("kind must be 'meal' or 'workout'")
+
+
+class ImportResult:
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []
+        self.failed = 0
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < Config.BULK_MAX_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def to_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+def import_logs(username, stream, fmt="ndjson"):
+    """
+    Imports every record in `stream` for `username`. Invalid lines are
+    reported and skipped; valid ones are written in batches of
+    BULK_BATCH_SIZE. Returns an ImportResult.
+    """
+    result = ImportResult()
+    batches = {"meals": [], "workouts": []}
+
+    def flush(kind):
+        batch = batches[kind]
+        if not batch:
+            return
+        line_numbers = [line_number for line_number, _ in batch]
+        inserted, failures = insert_batch(username, kind, [doc for _, doc in batch])
+        result.inserted += inserted
+        for index, message in failures:
+            result.error(line_numbers[index], message)
+        batches[kind] = []
+
+    records = csv_records(stream) if fmt == "csv" else ndjson_records(stream)
+    for line_number, record, parse_error in records:
+        if parse_error:
+            result.error(line_number, parse_error)
+            continue
+        try:
+            kind, doc = to_document(username, record)
+        except ValueError as e:
+            result.error(line_number, str(e))
+            continue
+
+        batches[kind].append((line_number, doc))
+        if len(batches[kind]) >= Config.BULK_BATCH_SIZE:
+            flush(kind)
+
+    flush("meals")
+    flush("workouts")
+    return result
+
+
+def export_date(date):
+    # Stored dates come back as naive UTC
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.isoformat().replace("+00:00", "Z")
+
+
+def to_record(kind, doc):
+    """
+    Inverse of to_document: the record format accepted by import_logs.
+    """
+    if kind == "meals":
+        return {
+            "kind": "meal",
+            "date": export_date(doc["meal_date"]),
+            "type": doc.get("meal_type"),
+            "items": doc.get("meal_items", [])
+        }
+    return {
+        "kind": "workout",
+        "date": export_date(doc["workout_date"]),
+        "type": doc.get("workout_type"),
+        "activities": doc.get("workout_activities", []),
+        "notes": doc.get("notes")
+    }
+
+
+def export_ndjson(username):
+    for kind, doc in iter_logs(username, Config.EXPORT_BATCH_SIZE):
+        yield json.dumps(to_record(kind, doc)) + "\n"
+
+
+def export_csv(username):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writeheader()
+    yield flush()
+
+    for kind, doc in iter_logs(username, Config.EXPORT_BATCH_SIZE):
+        record = to_record(kind, doc)
+        writer.writerow({
+            "kind": record["kind"],
+            "date": record["date"],
+            "type": record.get("type") or "",
+            "items": ";".join(record.get("items", [])),
+            "activities": json.dumps(record["activities"]) if "activities" in record else "",
+            "notes": record.get("notes") or ""
+        })
+        yield flush()
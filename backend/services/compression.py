@@ -0,0 +1,42 @@
+import gzip
+from flask import request
+from config import Config
+
+# Appended to the ETag of a gzipped body: it is a different representation
+# from the identity one, so it can't share a strong validator
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+def init_compression(app):
+    """
+    Gzips JSON responses for clients that accept it. Streamed responses
+    (SSE, audio) are passed through untouched.
+    """
+
+    @app.after_request
+    def compress_json(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code >= 300
+            or response.mimetype != "application/json"
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        if "gzip" not in request.accept_encodings:
+            return response
+
+        data = response.get_data()
+        if len(data) < Config.COMPRESS_MIN_BYTES:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=Config.COMPRESS_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + GZIP_ETAG_SUFFIX, weak)
+        return response
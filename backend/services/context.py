@@ -0,0 +1,204 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from config import Config
+from services.cache import LRUCache
+from services.storage import as_stored, find_logs
+
+# Formatted "past N days" meal and workout history used by the chat handlers
+# and the voice agent. The raw documents behind each user's window are cached
+# per process and kept current by the write paths in services/logs.py.
+
+CONTEXT_DAYS = 7
+
+MEAL_FIELDS = {"_id": 0, "meal_date": 1, "meal_type": 1, "meal_items": 1, "nutrition": 1}
+WORKOUT_FIELDS = {"_id": 0, "workout_date": 1, "workout_type": 1, "workout_activities": 1}
+
+
+def date_string(date):
+    return date.strftime('%Y-%m-%d') if isinstance(date, datetime) else str(date)
+
+
+def macro_summary(meal):
+    totals = (meal.get("nutrition") or {}).get("totals")
+    if not totals:
+        return ""
+    return f" (~{totals['calories']:.0f} kcal, {totals['protein']:.0f}g protein, {totals['carbs']:.0f}g carbs, {totals['fat']:.0f}g fat)"
+
+
+def format_meals(docs):
+    if not docs:
+        return "- No meals logged.\n"
+
+    lines = []
+    for meal in docs:
+        lines.append(f"- {meal.get('meal_type', 'Meal')} on {date_string(meal.get('meal_date'))}{macro_summary(meal)}:")
+        for item in meal.get("meal_items", []):
+            lines.append(f"  -{item} ")
+    return "\n".join(lines) + "\n"
+
+
+def format_workouts(docs):
+    if not docs:
+        return "- No workouts logged.\n"
+
+    lines = []
+    for workout in docs:
+        lines.append(f"- {workout.get('workout_type', 'Workout')} on {date_string(workout.get('workout_date'))}:")
+        for ex in workout.get("workout_activities", []):
+            name = ex.get("name", "Exercise")
+            if ex.get("mode", "") == "reps":
+                lines.append(f"  -{name}: {ex.get('sets', '?')} sets of {ex.get('reps', '?')} reps")
+            else:
+                lines.append(f"  -{name}: {ex.get('duration', '?')} minutes")
+    return "\n".join(lines) + "\n"
+
+
+class LogWindow:
+    """
+    One user's documents from `cutoff` onwards, plus the text last formatted
+    from them. As time passes the window is narrowed in memory instead of
+    being re-queried; new inserts are appended by the write path.
+    """
+
+    def __init__(self, docs, cutoff, date_field):
+        self.docs = docs
+        self.cutoff = cutoff
+        self.date_field = date_field
+        self.expires_at = time.monotonic() + Config.CONTEXT_CACHE_TTL
+        self.text = None
+        self.lock = threading.Lock()
+
+    def current(self, cutoff, formatter):
+        with self.lock:
+            if cutoff > self.cutoff:
+                kept = [doc for doc in self.docs if as_stored(doc.get(self.date_field)) >= cutoff]
+                if len(kept) != len(self.docs):
+                    self.docs = kept
+                    self.text = None
+                self.cutoff = cutoff
+
+            if self.text is None:
+                self.text = formatter(self.docs)
+            return self.text
+
+    def add(self, doc):
+        with self.lock:
+            if as_stored(doc.get(self.date_field)) >= self.cutoff:
+                self.docs.append(doc)
+                self.text = None
+
+
+# Keyed by (kind, username). Entries also expire after CONTEXT_CACHE_TTL so
+# writes handled by other worker processes show up within that bound.
+windows = LRUCache(Config.CONTEXT_CACHE_USERS * 2)
+
+
+def window_for(kind, username, cutoff):
+    key = (kind, username)
+    window = windows.get(key)
+    if window is not None and window.expires_at > time.monotonic() and window.cutoff <= cutoff:
+        return window
+
+    if kind == "meals":
+        docs = list(find_logs("meals", username, start=cutoff, fields=MEAL_FIELDS))
+        window = LogWindow(docs, cutoff, "meal_date")
+    else:
+        docs = list(find_logs("workouts", username, start=cutoff, fields=WORKOUT_FIELDS))
+        window = LogWindow(docs, cutoff, "workout_date")
+
+    windows.put(key, window)
+    return window
+
+
+def meal_context(username):
+    """
+    Formats the user's meals from the past 7 days as a bulleted list for prompts.
+    """
+    cutoff = datetime.now() - timedelta(days=CONTEXT_DAYS)
+    return window_for("meals", username, cutoff).current(cutoff, format_meals)
+
+
+def workout_context(username):
+    """
+    Formats the user's workouts from the past 7 days as a bulleted list for prompts.
+    """
+    cutoff = datetime.now() - timedelta(days=CONTEXT_DAYS)
+    return window_for("workouts", username, cutoff).current(cutoff, format_workouts)
+
+
+def recent_meals(username, days=CONTEXT_DAYS):
+    """
+    The user's meal documents from the past `days` days. Windows up to
+    CONTEXT_DAYS are served from the cached window.
+    """
+    cutoff = datetime.now() - timedelta(days=days)
+    if days > CONTEXT_DAYS:
+        return list(find_logs("meals", username, start=cutoff, fields=MEAL_FIELDS))
+
+    window = window_for("meals", username, datetime.now() - timedelta(days=CONTEXT_DAYS))
+    with window.lock:
+        return [doc for doc in window.docs if as_stored(doc.get("meal_date")) >= cutoff]
+
+
+def recent_workouts(username, days=CONTEXT_DAYS):
+    """
+    The user's workout documents from the past `days` days. Windows up to
+    CONTEXT_DAYS are served from the cached window.
+    """
+    cutoff = datetime.now() - timedelta(days=days)
+    if days > CONTEXT_DAYS:
+        return list(find_logs("workouts", username, start=cutoff, fields=WORKOUT_FIELDS))
+
+    window = window_for("workouts", username, datetime.now() - timedelta(days=CONTEXT_DAYS))
+    with window.lock:
+        return [doc for doc in window.docs if as_stored(doc.get("workout_date")) >= cutoff]
+
+
+def compact_meals(docs):
+    """
+    Token-lean form for the realtime agent: {"YYYY-MM-DD": ["lunch 650kcal: rice; chicken"]}
+    """
+    days = {}
+    for meal in docs:
+        totals = (meal.get("nutrition") or {}).get("totals")
+        calories = f" {totals['calories']:.0f}kcal" if totals else ""
+        entry = f"{meal.get('meal_type') or 'meal'}{calories}: {'; '.join(meal.get('meal_items', []))}"
+        days.setdefault(date_string(meal.get("meal_date")), []).append(entry)
+    return days
+
+
+def compact_activity(ex):
+    name = ex.get("name", "exercise")
+    if ex.get("mode", "") == "reps":
+        return f"{name} {ex.get('sets', '?')}x{ex.get('reps', '?')}"
+    return f"{name} {ex.get('duration', '?')}min"
+
+
+def compact_workouts(docs):
+    """
+    Token-lean form for the realtime agent: {"YYYY-MM-DD": ["push: bench 3x10; run 20min"]}
+    """
+    days = {}
+    for workout in docs:
+        activities = "; ".join(compact_activity(ex) for ex in workout.get("workout_activities", []))
+        entry = f"{workout.get('workout_type') or 'workout'}: {activities}"
+        days.setdefault(date_string(workout.get("workout_date")), []).append(entry)
+    return days
+
+
+def record_meal(username, doc):
+    window = windows.peek(("meals", username))
+    if window is not None:
+        window.add({key: doc.get(key) for key in MEAL_FIELDS if key != "_id"})
+
+
+def record_workout(username, doc):
+    window = windows.peek(("workouts", username))
+    if window is not None:
+        window.add({key: doc.get(key) for key in WORKOUT_FIELDS if key != "_id"})
+
+
+def invalidate(username):
+    windows.pop(("meals", username))
+    windows.pop(("workouts", username))
@@ -1,16 +1,199 @@
-from pymongo import MongoClient
+import os
+import threading
+import time
+from pymongo import MongoClient, monitoring
 from config import Config
 
-# Initialize a single MongoClient instance (thread‐safe)
-mongo_client = MongoClient(Config.MONGODB_URI)
-db = mongo_client["gymbro"]
+# One MongoClient per process, created on first use. MongoClient is thread-safe
+# but not fork-safe, so a process forked after the client exists (e.g. a
+# pre-forking server with preload) builds its own instead of sharing sockets.
+# Collections are handed out as lazy proxies, so modules can keep grabbing
+# them at import time without opening a connection.
 
-# By default, using the database name from the URI’s path.
-db = mongo_client.get_default_database()
+_client = None
+_database = None
+_client_pid = None
+_client_lock = threading.Lock()
 
-users = db["users"]
-meals = db["meals"]
-workouts = db["workouts"]
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Counts connection checkouts and how long they waited for a free
+    connection, per process. Read with pool_stats().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = {}
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.waits_over_threshold = 0
+
+    def connection_check_out_started(self, event):
+        with self.lock:
+            self.started[threading.get_ident()] = time.perf_counter()
+
+    def checkout_finished(self):
+        start = self.started.pop(threading.get_ident(), None)
+        return time.perf_counter() - start if start is not None else 0.0
+
+    def connection_checked_out(self, event):
+        with self.lock:
+            waited = self.checkout_finished()
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited * 1000 >= Config.MONGO_SLOW_CHECKOUT_MS:
+                self.waits_over_threshold += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.checkout_finished()
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self.lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.connections_closed += 1
+
+    # Required by the listener interface; nothing to count
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "max_pool_size": Config.MONGO_MAX_POOL_SIZE,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "open_connections": self.connections_created - self.connections_closed,
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+                "slow_checkouts": self.waits_over_threshold
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def write_concern():
+    w = Config.MONGO_WRITE_CONCERN
+    return int(w) if w.isdigit() else w
+
+
+def get_client():
+    """
+    The MongoClient for this process, created on first use (and again after a fork).
+    """
+    connect()
+    return _client
+
+
+def get_database():
+    connect()
+    return _database
+
+
+def connect():
+    global _client, _database, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return
+
+    with _client_lock:
+        if _client is not None and _client_pid == pid:
+            return
+        if _client_pid is not None:
+            # Inherited from the parent: its counters and sockets aren't ours
+            pool_metrics.reset()
+
+        _client = MongoClient(
+            Config.MONGODB_URI,
+            maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+            minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+            readPreference=Config.MONGO_READ_PREFERENCE,
+            w=write_concern(),
+            event_listeners=[pool_metrics],
+            connect=False
+        )
+        # MONGO_DB_NAME wins, then the database in the URI path, then "gymbro"
+        if Config.MONGO_DB_NAME:
+            _database = _client.get_database(Config.MONGO_DB_NAME)
+        else:
+            _database = _client.get_default_database(default="gymbro")
+        _client_pid = pid
+
+
+class LazyCollection:
+    """
+    Stands in for a pymongo Collection, resolved against this process's
+    client on first use and again after a fork.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.collection = None
+        self.pid = None
+
+    def resolve(self):
+        if self.collection is None or self.pid != os.getpid():
+            self.collection = get_database()[self.name]
+            self.pid = os.getpid()
+        return self.collection
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+users = LazyCollection("users")
+meals = LazyCollection("meals")
+workouts = LazyCollection("workouts")
+daily_summaries = LazyCollection("daily_summaries")
+meal_buckets = LazyCollection("meal_buckets")
+workout_buckets = LazyCollection("workout_buckets")
 
 def get_user_collection():
     return users
@@ -19,4 +202,16 @@ def get_meal_collection():
     return meals
 
 def get_workout_collection():
-    return workouts
\ No newline at end of file
+    return workouts
+
+def get_summary_collection():
+    return daily_summaries
+
+def get_meal_bucket_collection():
+    return meal_buckets
+
+def get_workout_bucket_collection():
+    return workout_buckets
+
+def pool_stats():
+    return pool_metrics.stats()
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from langchain_openai import OpenAIEmbeddings
+from config import Config
+from services.cache import LRUCache
+
+# Must match the model RAG/setup.py indexed the documents with
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+embedder = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+def normalize_query(text):
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def cache_key(text, model=EMBEDDING_MODEL):
+    """
+    Queries that differ only in case or whitespace share an embedding.
+    """
+    digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+    return f"{model}-{digest}"
+
+
+# A hit only rewrites a row's last-used time when it's older than this, so
+# popular keys don't turn every read into a write
+USED_REFRESH_SECONDS = 60
+
+
+class SqliteEmbeddingCache:
+    """
+    Persistent tier of the embedding cache: one row per key with the vector
+    packed as float32. When it grows past max_entries the least recently used
+    tenth is deleted. Safe to share between worker processes; any SQLite
+    error (a locked or corrupt file) is treated as a miss.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            self.entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def connection(self):
+        # sqlite3 connections can't cross threads or forks; keep one per thread per process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self.connection() as conn:
+                row = conn.execute("SELECT vector, used FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] < now - USED_REFRESH_SECONDS:
+                    conn.execute("UPDATE embeddings SET used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return array("f", row[0]).tolist()
+
+    def put(self, key, vector):
+        data = array("f", vector).tobytes()
+        try:
+            with self.connection() as conn:
+                added = conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, used) VALUES (?, ?, ?)", (key, data, time.time())
+                ).rowcount
+                if not added:
+                    # Another worker cached it first; refresh rather than count it twice
+                    conn.execute("UPDATE embeddings SET vector = ?, used = ? WHERE key = ?", (data, time.time(), key))
+                    return
+
+                with self._lock:
+                    self.entries += 1
+                    full = self.entries > self.max_entries
+                if full:
+                    self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn):
+        # Other workers write here too, so recount before trimming
+        entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = entries - self.max_entries * 9 // 10
+        if excess > 0 and entries > self.max_entries:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                (excess,)
+            )
+            entries -= excess
+        with self._lock:
+            self.entries = entries
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self.entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class Timings:
+    """
+    Time spent serving lookups from the cache vs calling the embeddings API,
+    so the latency the cache saves can be estimated.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.hit_seconds = 0.0
+        self.api_calls = 0
+        self.api_seconds = 0.0
+
+    def record(self, hit, seconds):
+        with self.lock:
+            if hit:
+                self.hits += 1
+                self.hit_seconds += seconds
+            else:
+                self.api_calls += 1
+                self.api_seconds += seconds
+
+    def stats(self):
+        with self.lock:
+            hit_avg = self.hit_seconds / self.hits if self.hits else 0.0
+            api_avg = self.api_seconds / self.api_calls if self.api_calls else 0.0
+            return {
+                "hit_avg_ms": round(hit_avg * 1000, 3),
+                "api_calls": self.api_calls,
+                "api_avg_ms": round(api_avg * 1000, 3),
+                # Every hit would otherwise have cost an average API call
+                "estimated_saved_ms": round(self.hits * max(api_avg - hit_avg, 0.0) * 1000, 1)
+            }
+
+
+memory_cache = LRUCache(Config.EMBEDDING_CACHE_ENTRIES)
+disk_cache = SqliteEmbeddingCache(Config.EMBEDDING_CACHE_PATH, Config.EMBEDDING_CACHE_DISK_ENTRIES) if Config.EMBEDDING_CACHE_PATH else None
+timings = Timings()
+
+
+def cached_embedding(key):
+    vector = memory_cache.get(key)
+    if vector is None and disk_cache is not None:
+        vector = disk_cache.get(key)
+        if vector is not None:
+            memory_cache.put(key, vector)
+    return vector
+
+
+def embed_query(text):
+    """
+    The embedding of a search query, calling OpenAI only on a cache miss.
+    """
+    started = time.perf_counter()
+    key = cache_key(text)
+    vector = cached_embedding(key)
+    if vector is not None:
+        timings.record(True, time.perf_counter() - started)
+        return vector
+
+    vector = embedder.embed_query(text)
+    memory_cache.put(key, vector)
+    if disk_cache is not None:
+        disk_cache.put(key, vector)
+    timings.record(False, time.perf_counter() - started)
+    return vector
+
+
+def cache_stats():
+    memory = memory_cache.stats()
+    disk = disk_cache.stats() if disk_cache is not None else None
+
+    # A lookup reaches the disk tier only after missing in memory
+    lookups = memory["hits"] + memory["misses"]
+    hits = memory["hits"] + (disk["hits"] if disk else 0)
+    return {
+        "model": EMBEDDING_MODEL,
+        "memory": memory,
+        "disk": disk,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        **timings.stats()
+    }
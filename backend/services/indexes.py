@@ -0,0 +1,73 @@
+"""
+Index bootstrap for the gymbro collections.
+
+    python -m services.indexes    # create any missing indexes
+
+create_app() runs ensure_indexes() at startup unless MONGO_ENSURE_INDEXES is off.
+tests/test_query_plans.py checks every query shape the routes run against
+these indexes.
+"""
+import argparse
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from services.db import (
+    get_user_collection, get_meal_collection, get_workout_collection, get_summary_collection,
+    get_meal_bucket_collection, get_workout_bucket_collection
+)
+
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True)
+    ],
+    "meals": [
+        IndexModel([("username", ASCENDING), ("meal_date", ASCENDING), ("_id", ASCENDING)], name="username_meal_date_id")
+    ],
+    "workouts": [
+        IndexModel([("username", ASCENDING), ("workout_date", ASCENDING), ("_id", ASCENDING)], name="username_workout_date_id")
+    ],
+    "daily_summaries": [
+        IndexModel([("username", ASCENDING), ("day", ASCENDING)], name="username_day_unique", unique=True)
+    ],
+    "meal_buckets": [
+        IndexModel([("username", ASCENDING), ("week", ASCENDING)], name="username_week_unique", unique=True)
+    ],
+    "workout_buckets": [
+        IndexModel([("username", ASCENDING), ("week", ASCENDING)], name="username_week_unique", unique=True)
+    ]
+}
+
+def collections():
+    return {
+        "users": get_user_collection(),
+        "meals": get_meal_collection(),
+        "workouts": get_workout_collection(),
+        "daily_summaries": get_summary_collection(),
+        "meal_buckets": get_meal_bucket_collection(),
+        "workout_buckets": get_workout_bucket_collection()
+    }
+
+
+def ensure_indexes():
+    """
+    Creates every index in INDEXES. Safe to run repeatedly: existing indexes
+    with the same definition are left alone. Returns {collection: [names]}.
+    """
+    created = {}
+    for name, collection in collections().items():
+        try:
+            created[name] = collection.create_indexes(INDEXES[name])
+        except OperationFailure as e:
+            # Most likely duplicate usernames blocking the unique index
+            raise RuntimeError(f"Could not create indexes on {name}: {e}") from e
+    return created
+
+
+def main():
+    argparse.ArgumentParser(description="Create gymbro indexes.").parse_args()
+
+    for name, indexes in ensure_indexes().items():
+        print(f"{name}: {', '.join(indexes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+# In-process intent classifier for chat messages. A multinomial naive Bayes
+# model over word unigrams and bigrams, trained at import time from the
+# labelled messages bundled in data/intent_train.jsonl.
+
+LABELS = ["log meal/workout", "nutrition", "workout", "other"]
+
+TRAINING_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "intent_train.jsonl")
+
+# Short yes/no style replies only make sense next to a pending log proposal
+CONFIRMATION_PATTERN = re.compile(
+    r"^(yes|yeah|yep|yup|sure|correct|confirm(ed)?|right|that'?s (right|correct)|looks (good|right)|"
+    r"no|nope|not quite|actually)\b"
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(message):
+    words = TOKEN_PATTERN.findall(message.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def load_labelled_messages(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class IntentClassifier:
+    def __init__(self, examples, alpha=0.5, sharpness=4.0):
+        self.alpha = alpha
+        self.sharpness = sharpness
+        label_counts = Counter()
+        self.feature_counts = defaultdict(Counter)
+
+        for example in examples:
+            label = example["label"]
+            label_counts[label] += 1
+            self.feature_counts[label].update(tokenize(example["message"]))
+
+        total = sum(label_counts.values())
+        self.vocabulary = set()
+        for counts in self.feature_counts.values():
+            self.vocabulary.update(counts)
+
+        self.log_priors = {label: math.log(label_counts[label] / total) for label in LABELS}
+        self.totals = {label: sum(self.feature_counts[label].values()) for label in LABELS}
+
+    def predict(self, message):
+        """
+        Returns (label, confidence). Per-feature log-likelihoods are averaged
+        rather than summed so long messages don't push every posterior to 1.0.
+        """
+        features = [f for f in tokenize(message) if f in self.vocabulary]
+        if not features:
+            return "other", 0.0
+
+        denominator = len(self.vocabulary) * self.alpha
+        scores = {}
+        for label in LABELS:
+            counts = self.feature_counts[label]
+            log_likelihood = sum(
+                math.log((counts[f] + self.alpha) / (self.totals[label] + denominator))
+                for f in features
+            )
+            scores[label] = self.log_priors[label] + log_likelihood / len(features) * self.sharpness
+
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / norm
+
+
+_classifier = IntentClassifier(load_labelled_messages(TRAINING_DATA_PATH))
+
+
+def classify_local(message, pending_log=False):
+    """
+    Classifies a chat message into one of LABELS in-process.
+    Returns (label, confidence); callers should fall back to the LLM
+    classifier when the confidence is below their threshold.
+    """
+    normalized = message.strip().lower()
+
+    if len(normalized.split()) <= 6 and CONFIRMATION_PATTERN.match(normalized):
+        if pending_log:
+            return "log meal/workout", 1.0
+        # A bare yes/no without a proposal depends on conversation context
+        return "other", 0.0
+
+    return _classifier.predict(message)
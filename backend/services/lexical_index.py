@@ -0,0 +1,112 @@
+"""
+BM25 keyword search over the RAG chunks, from the index RAG/setup.py writes
+to LEXICAL_INDEX_DIR:
+
+    meta.json      {"count", "terms", "avgdl", "k1", "b", "stopwords"}
+    vocab.json     {term: [start, end, idf]}, a slice of the postings arrays
+    postings.npz   doc_ids (int32) and weights (float32), grouped by term
+    docs.jsonl     one {"id", "text", "source", "category"} per row
+
+Weights are the per-posting BM25 term scores, precomputed at build time, so
+scoring a query is one scatter-add per query term.
+"""
+import json
+import os
+import re
+import threading
+import numpy as np
+from config import Config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text, stopwords):
+    # Must match tokenize in RAG/setup.py
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in stopwords:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with np.load(os.path.join(directory, "postings.npz")) as postings:
+            self.doc_ids = postings["doc_ids"]
+            self.weights = postings["weights"]
+        with open(os.path.join(directory, "docs.jsonl"), encoding="utf-8") as f:
+            self.docs = [json.loads(line) for line in f if line.strip()]
+
+        self.count = self.meta["count"]
+        self.stopwords = frozenset(self.meta["stopwords"])
+
+    def search(self, query, top_k):
+        """
+        The `top_k` best BM25 matches for `query`, shaped like Pinecone
+        matches. Each also has "rarest_idf": the IDF of the rarest query
+        term the chunk contains, a measure of how specific the match is.
+        """
+        terms = set(tokenize(query, self.stopwords))
+        if not terms or not self.count:
+            return []
+
+        scores = np.zeros(self.count, dtype=np.float32)
+        rarest = np.zeros(self.count, dtype=np.float32)
+        for term in terms:
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+            start, end, idf = entry
+            rows = self.doc_ids[start:end]
+            scores[rows] += self.weights[start:end]
+            # Rows are unique within a term's postings
+            rarest[rows] = np.maximum(rarest[rows], idf)
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top_k = min(top_k, len(hits))
+        rows = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+
+        return [
+            {
+                "id": self.docs[row]["id"],
+                "score": float(scores[row]),
+                "rarest_idf": round(float(rarest[row]), 3),
+                "metadata": {key: value for key, value in self.docs[row].items() if key != "id"}
+            }
+            for row in rows
+        ]
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def lexical_index():
+    """
+    The keyword index, loaded on first use and reloaded when a rebuild
+    replaces meta.json. None until RAG/setup.py has built one.
+    """
+    global _index, _index_mtime
+    try:
+        mtime = os.stat(os.path.join(Config.LEXICAL_INDEX_DIR, "meta.json")).st_mtime_ns
+    except OSError:
+        # Missing, or mid-swap during a rebuild
+        return _index
+
+    if _index is None or mtime != _index_mtime:
+        with _index_lock:
+            if _index is None or mtime != _index_mtime:
+                _index = LexicalIndex(Config.LEXICAL_INDEX_DIR)
+                _index_mtime = mtime
+    return _index
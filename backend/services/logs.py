@@ -0,0 +1,143 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+from bson import ObjectId
+from services import context, summaries, versions
+from services.nutrition import enrich_meal
+from services.storage import DATE_FIELDS, find_logs, insert_log, insert_logs
+
+# Every meal and workout write goes through here so the derived per-user
+# data (macro index, cached 7-day context, daily summaries, data version)
+# stays in step with the collections.
+# Paged reads across both kinds live here too. Storage itself (one document
+# per log or weekly buckets) is handled by services/storage.py.
+
+
+def insert_meal(username, meal_date, meal_type, meal_items):
+    doc = {
+        "username": username,
+        "meal_date": meal_date,
+        "meal_type": meal_type,
+        "meal_items": meal_items,
+        "nutrition": enrich_meal(meal_items)
+    }
+    insert_log("meals", doc)
+    context.record_meal(username, doc)
+    summaries.record(username, "meals", meal_date, macros=doc["nutrition"]["totals"])
+    versions.bump(username)
+    return doc
+
+
+def insert_workout(username, workout_date, workout_type, workout_activities, notes=None):
+    doc = {
+        "username": username,
+        "workout_date": workout_date,
+        "workout_type": workout_type,
+        "workout_activities": workout_activities,
+        "notes": notes
+    }
+    insert_log("workouts", doc)
+    context.record_workout(username, doc)
+    summaries.record(username, "workouts", workout_date)
+    versions.bump(username)
+    return doc
+
+
+def insert_batch(username, kind, docs):
+    """
+    Unordered batch insert of prepared meal or workout documents (kind is
+    "meals" or "workouts"). Returns (inserted_count, [(index, error), ...])
+    for the documents Mongo rejected.
+    """
+    if kind == "meals":
+        for doc in docs:
+            if "nutrition" not in doc:
+                doc["nutrition"] = enrich_meal(doc.get("meal_items", []))
+
+    inserted, failures = insert_logs(kind, docs)
+    failed = {index for index, _ in failures}
+    written = [doc for index, doc in enumerate(docs) if index not in failed]
+    summaries.record_many(username, kind, written)
+    context.invalidate(username)
+    versions.bump(username)
+    return inserted, failures
+
+
+# Fields returned by range reads, per log kind
+PAGE_FIELDS = {
+    "meals": {"meal_date": 1, "meal_type": 1, "meal_items": 1},
+    "workouts": {"workout_date": 1, "workout_type": 1, "workout_activities": 1, "notes": 1}
+}
+
+
+def encode_cursor(positions):
+    raw = json.dumps({
+        kind: [date.isoformat(), str(oid)] if (date, oid) != (None, None) else None
+        for kind, (date, oid) in positions.items()
+    })
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Returns {kind: (date, ObjectId)} for the last entry of each kind already
+    returned. Raises ValueError for anything that isn't one of our cursors.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        positions = {}
+        for kind in DATE_FIELDS:
+            position = raw.get(kind)
+            positions[kind] = (datetime.fromisoformat(position[0]), ObjectId(position[1])) if position else (None, None)
+        return positions
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def find_page(kind, username, start, end, after, limit):
+    return list(find_logs(kind, username, start, end, PAGE_FIELDS[kind], after=after, limit=limit + 1))
+
+
+def logs_page(username, start, end, limit, cursor=None):
+    """
+    One page of the user's meals and workouts in [start, end), oldest first,
+    merged across both collections. Returns (entries, next_cursor) where each
+    entry is (kind, doc) and next_cursor is None on the last page.
+    """
+    positions = decode_cursor(cursor) if cursor else {kind: (None, None) for kind in DATE_FIELDS}
+
+    streams = [
+        [(doc[DATE_FIELDS[kind]], doc["_id"], kind, doc) for doc in find_page(kind, username, start, end, positions[kind], limit)]
+        for kind in DATE_FIELDS
+    ]
+    merged = list(heapq.merge(*streams, key=lambda entry: (entry[0], entry[1])))
+
+    page = merged[:limit]
+    for date, oid, kind, _ in page:
+        positions[kind] = (date, oid)
+
+    next_cursor = encode_cursor(positions) if len(merged) > limit else None
+    return [(kind, doc) for _, _, kind, doc in page], next_cursor
+
+
+def tagged(kind, cursor):
+    # A generator function, so each stream binds its own kind and date field
+    date_field = DATE_FIELDS[kind]
+    for doc in cursor:
+        yield doc[date_field], kind, doc
+
+
+def iter_logs(username, batch_size):
+    """
+    Lazily yields (kind, doc) for all of the user's meals and workouts in
+    date order. Both cursors stream in batches of `batch_size`, so memory
+    stays flat however long the history is.
+    """
+    streams = [
+        tagged(kind, find_logs(kind, username, fields={"_id": 0, **PAGE_FIELDS[kind]}, batch_size=batch_size))
+        for kind in DATE_FIELDS
+    ]
+
+    for _, kind, doc in heapq.merge(*streams, key=lambda entry: entry[0]):
+        yield kind, doc
@@ -0,0 +1,271 @@
+"""
+Macronutrient index for logged meals.
+
+Meal items are free text ("2 eggs", "200g chicken breast", "1 cup rice"). On
+write each item is matched against the bundled food table in data/foods.csv
+(values per 100 g) and stored alongside the meal as
+
+    "nutrition": {"items": [{"text", "food", "grams", "calories", "protein", "carbs", "fat"}],
+                  "totals": {"calories", "protein", "carbs", "fat"}, "unmatched": n}
+
+and the totals are added to the user's daily summary, so daily and weekly
+macro summaries are plain arithmetic over a handful of summary documents.
+Meals stored before this existed (or after foods.csv changes) are enriched by
+`python -m services.summaries --backfill [--reenrich]`.
+"""
+import csv
+import os
+import re
+from datetime import timedelta
+import numpy as np
+from pymongo import UpdateOne
+from services.db import get_summary_collection
+from services.storage import buckets, collections, using_buckets
+
+summaries = get_summary_collection()
+
+FOODS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "foods.csv")
+
+MACROS = ["calories", "protein", "carbs", "fat"]
+
+# Longest food name or alias, in words
+MAX_NAME_WORDS = 4
+
+MASS_UNITS = {
+    "g": 1, "gram": 1, "kg": 1000, "kilo": 1000,
+    "oz": 28.35, "ounce": 28.35, "lb": 453.6, "pound": 453.6,
+    "ml": 1, "l": 1000
+}
+# Fractions of a cup
+VOLUME_UNITS = {"cup": 1, "tbsp": 1 / 16, "tablespoon": 1 / 16, "tsp": 1 / 48, "teaspoon": 1 / 48}
+
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "half": 0.5, "couple": 2
+}
+
+NUMBER = r"\d+(?:\.\d+)?(?:/\d+)?"
+# A number standing on its own, so the 8 in "v8 juice" isn't a quantity
+QUANTITY_PATTERN = re.compile(rf"(?<![a-z0-9.])(?P<quantity>{NUMBER})\s*(?P<unit>[a-z]+)?\b")
+
+# "chicken and rice", "oats with milk, banana": each part is its own item
+ITEM_SEPARATOR = re.compile(r",|&|\band\b|\bwith\b")
+
+
+def singular(word):
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def words(text):
+    return [singular(word) for word in re.findall(r"[a-z]+", text.lower())]
+
+
+def parse_number(value):
+    if "/" in value:
+        numerator, denominator = value.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else 0.0
+    return float(value)
+
+
+class FoodTable:
+    """
+    The food-composition table, indexed by every name and alias.
+    """
+
+    def __init__(self, path=FOODS_PATH):
+        self.foods = {}
+        self.names = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                food = {
+                    "name": row["name"],
+                    "serving_grams": float(row["serving_grams"]),
+                    "cup_grams": float(row["cup_grams"]) if row["cup_grams"] else None,
+                    **{macro: float(row[macro]) for macro in MACROS}
+                }
+                self.foods[row["name"]] = food
+                for name in [row["name"], *filter(None, row["aliases"].split(";"))]:
+                    self.names[" ".join(words(name))] = food
+
+    def match(self, tokens):
+        """
+        The food named by the longest run of `tokens`, or None.
+        """
+        for size in range(min(MAX_NAME_WORDS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                food = self.names.get(" ".join(tokens[start:start + size]))
+                if food:
+                    return food
+        return None
+
+
+_table = None
+
+
+def food_table():
+    global _table
+    if _table is None:
+        _table = FoodTable()
+    return _table
+
+
+def portion_grams(text, food):
+    """
+    Grams eaten, from an explicit amount ("200g", "1.5 cups", "2 slices"),
+    a count ("2 eggs", "two eggs") or one serving when neither is given.
+    """
+    text = text.lower()
+    cup_grams = food["cup_grams"] or food["serving_grams"]
+
+    match = QUANTITY_PATTERN.search(text)
+    if match:
+        quantity = parse_number(match.group("quantity"))
+        unit = singular(match.group("unit") or "")
+    else:
+        tokens = text.split()
+        if not tokens or tokens[0] not in WORD_NUMBERS:
+            return food["serving_grams"]
+        quantity = WORD_NUMBERS[tokens[0]]
+        unit = singular(tokens[1]) if len(tokens) > 1 else ""
+
+    if unit in MASS_UNITS:
+        return quantity * MASS_UNITS[unit]
+    if unit in VOLUME_UNITS:
+        return quantity * VOLUME_UNITS[unit] * cup_grams
+    # "2 slices", or a bare count as in "3 scrambled eggs"
+    return quantity * food["serving_grams"]
+
+
+def parse_item(text):
+    """
+    One normalized meal item. `food` is None when nothing in the table
+    matches; its macros are then left out of the totals.
+    """
+    food = food_table().match(words(text))
+    if food is None:
+        return {"text": text, "food": None, "grams": None, **{macro: 0.0 for macro in MACROS}}
+
+    grams = portion_grams(text, food)
+    return {
+        "text": text,
+        "food": food["name"],
+        "grams": round(grams, 1),
+        **{macro: round(food[macro] * grams / 100, 1) for macro in MACROS}
+    }
+
+
+def split_item(text):
+    """
+    The foods in one meal item, split on "and", "with", "&" and commas.
+    """
+    return [part.strip() for part in ITEM_SEPARATOR.split(text) if part.strip()]
+
+
+def enrich_meal(meal_items):
+    """
+    The "nutrition" field stored with a meal. An item naming several foods
+    contributes one entry per food.
+    """
+    items = [parse_item(part) for text in meal_items if isinstance(text, str) for part in split_item(text)]
+    return {
+        "items": items,
+        "totals": {macro: round(sum(item[macro] for item in items), 1) for macro in MACROS},
+        "unmatched": sum(1 for item in items if item["food"] is None)
+    }
+
+
+def meal_totals(doc):
+    return (doc.get("nutrition") or {}).get("totals") or {}
+
+
+def nutrition_summary(username, start, days):
+    """
+    Daily macro totals for the `days` days from `start`, plus Monday-based
+    weekly totals and averages over the days that had meals, computed from
+    the per-day summary documents.
+    """
+    end = start + timedelta(days=days)
+    rows = summaries.find(
+        {"username": username, "day": {"$gte": start.strftime("%Y-%m-%d"), "$lt": end.strftime("%Y-%m-%d")}},
+        {"_id": 0, "day": 1, "meals": 1, **{macro: 1 for macro in MACROS}}
+    )
+
+    rows = list(rows)
+
+    # One row per calendar day, one column per macro
+    values = np.zeros((days, len(MACROS)))
+    meal_counts = np.zeros(days, dtype=np.int64)
+    if rows:
+        offsets = (np.array([row["day"] for row in rows], dtype="datetime64[D]") - np.datetime64(start.strftime("%Y-%m-%d"), "D")).astype(np.int64)
+        values[offsets] = np.array([[row.get(macro, 0) for macro in MACROS] for row in rows], dtype=float)
+        meal_counts[offsets] = [row.get("meals", 0) for row in rows]
+
+    # Pad to whole Monday-to-Sunday weeks and sum each one
+    lead = start.weekday()
+    trail = -(lead + days) % 7
+    padded = np.pad(values, ((lead, trail), (0, 0)))
+    weekly = padded.reshape(-1, 7, len(MACROS)).sum(axis=1)
+
+    logged = meal_counts > 0
+    averages = values[logged].mean(axis=0) if logged.any() else np.zeros(len(MACROS))
+
+    def as_macros(row):
+        return {macro: round(float(value), 1) for macro, value in zip(MACROS, row)}
+
+    week_start = start - timedelta(days=lead)
+    return {
+        "days": [
+            {"date": (start + timedelta(days=i)).strftime("%Y-%m-%d"), "meals": int(meal_counts[i]), **as_macros(values[i])}
+            for i in range(days)
+        ],
+        "weeks": [
+            {"week_start": (week_start + timedelta(weeks=i)).strftime("%Y-%m-%d"), **as_macros(weekly[i])}
+            for i in range(len(weekly))
+        ],
+        "totals": as_macros(values.sum(axis=0)),
+        "daily_average": as_macros(averages),
+        "days_logged": int(logged.sum())
+    }
+
+
+def enrich_stored_meals(force=False):
+    """
+    Adds the "nutrition" field to stored meals that lack it (every meal with
+    force=True), in whichever layout LOG_STORAGE selects. Returns the number
+    of meals updated.
+    """
+    updated = 0
+    batch = []
+
+    if using_buckets():
+        target = buckets["meals"]
+        query = {} if force else {"entries": {"$elemMatch": {"nutrition": {"$exists": False}}}}
+        for bucket in target.find(query, {"username": 1, "week": 1, "entries": 1}):
+            for entry in bucket.get("entries", []):
+                if force or "nutrition" not in entry:
+                    batch.append(UpdateOne(
+                        {"_id": bucket["_id"]},
+                        {"$set": {"entries.$[entry].nutrition": enrich_meal(entry.get("meal_items", []))}},
+                        array_filters=[{"entry._id": entry["_id"]}]
+                    ))
+            if len(batch) >= 1000:
+                updated += target.bulk_write(batch, ordered=False).modified_count
+                batch = []
+    else:
+        target = collections["meals"]
+        query = {} if force else {"nutrition": {"$exists": False}}
+        for meal in target.find(query, {"meal_items": 1}):
+            batch.append(UpdateOne({"_id": meal["_id"]}, {"$set": {"nutrition": enrich_meal(meal.get("meal_items", []))}}))
+            if len(batch) >= 1000:
+                updated += target.bulk_write(batch, ordered=False).modified_count
+                batch = []
+
+    if batch:
+        updated += target.bulk_write(batch, ordered=False).modified_count
+    return updated
@@ -0,0 +1,96 @@
+"""
+Hybrid retrieval for /pinecone/query.
+
+BM25 keyword results and vector results are merged with reciprocal rank
+fusion: each chunk scores sum(1 / (RAG_RRF_K + rank)) over the lists it
+appears in, so exact terms ("RPE", "creatine") and paraphrases both count.
+When the best keyword hit is strong on its own terms (it contains a rare
+query term and scores high), the keyword hits are returned as-is and the
+embedding and vector calls are skipped.
+"""
+import threading
+from collections import Counter
+from config import Config
+from services import vector_index
+from services.embeddings import embed_query
+from services.lexical_index import lexical_index
+
+MODES = ("hybrid", "vector", "lexical")
+
+answered = Counter()
+answered_lock = threading.Lock()
+
+
+def strong_keyword_match(results):
+    """
+    Whether the keyword hits are good enough to answer alone: the best one
+    contains a rare query term (IDF of at least RAG_LEXICAL_MIN_IDF) and
+    scores at least RAG_LEXICAL_MIN_SCORE. Common words alone never qualify,
+    however many chunks they match; a rare term qualifies even when only one
+    chunk contains it.
+    """
+    if not results:
+        return False
+    best = results[0]
+    return best["rarest_idf"] >= Config.RAG_LEXICAL_MIN_IDF and best["score"] >= Config.RAG_LEXICAL_MIN_SCORE
+
+
+def fuse(result_lists, top_k):
+    scores = {}
+    matches = {}
+    for results in result_lists:
+        for rank, match in enumerate(results, 1):
+            scores[match["id"]] = scores.get(match["id"], 0.0) + 1 / (Config.RAG_RRF_K + rank)
+            matches.setdefault(match["id"], match)
+
+    ranked = sorted(scores, key=lambda chunk_id: -scores[chunk_id])[:top_k]
+    return [
+        {"id": chunk_id, "score": round(scores[chunk_id], 6), "metadata": matches[chunk_id].get("metadata", {})}
+        for chunk_id in ranked
+    ]
+
+
+def retrieve(query, top_k=3, mode=None):
+    """
+    The `top_k` chunks for `query` and how they were found: "lexical"
+    (keyword fast path or lexical mode), "hybrid" or "vector". Hybrid falls
+    back to vector search until a keyword index has been built.
+    """
+    mode = mode or Config.RAG_RETRIEVAL
+    if mode not in MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Use one of: {', '.join(MODES)}")
+
+    lexical = lexical_index() if mode != "vector" else None
+    if mode == "lexical":
+        if lexical is None:
+            raise FileNotFoundError(f"No keyword index in {Config.LEXICAL_INDEX_DIR}; run `python RAG/setup.py`")
+        return record(lexical.search(query, top_k), "lexical")
+
+    candidates = max(top_k, Config.RAG_CANDIDATES)
+    lexical_results = lexical.search(query, candidates) if lexical is not None else []
+    if strong_keyword_match(lexical_results):
+        return record(lexical_results[:top_k], "lexical")
+
+    if not lexical_results:
+        return record(vector_index.search(embed_query(query), top_k), "vector")
+
+    vector_results = vector_index.search(embed_query(query), candidates)
+    return record(fuse([vector_results, lexical_results], top_k), "hybrid")
+
+
+def record(results, how):
+    with answered_lock:
+        answered[how] += 1
+    return results, how
+
+
+def retrieval_stats():
+    with answered_lock:
+        total = sum(answered.values())
+        return {
+            "mode": Config.RAG_RETRIEVAL,
+            "queries": total,
+            "answered": dict(answered),
+            # Queries answered without an embedding or vector call
+            "lexical_rate": answered["lexical"] / total if total else 0.0
+        }
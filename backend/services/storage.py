@@ -0,0 +1,279 @@
+"""
+Storage layout for meal and workout logs.
+
+With LOG_STORAGE=documents (the default) every log is its own document in
+`meals` / `workouts`. With LOG_STORAGE=buckets each user's logs for one week
+(Monday 00:00 UTC onwards) share a single document in `meal_buckets` /
+`workout_buckets`:
+
+    {"username": "...", "week": <Monday 00:00>, "count": 3,
+     "entries": [{"_id": ObjectId(...), "meal_date": ..., "meal_type": ..., "meal_items": [...]}]}
+
+so a week of history is one or two document reads instead of one per log.
+Every log read and write goes through find_logs / count_logs / insert_log /
+insert_logs here, whichever layout is configured.
+
+    python -m services.storage migrate   # copy meals/workouts into week buckets
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from services.db import (
+    get_meal_collection, get_workout_collection,
+    get_meal_bucket_collection, get_workout_bucket_collection
+)
+
+collections = {"meals": get_meal_collection(), "workouts": get_workout_collection()}
+buckets = {"meals": get_meal_bucket_collection(), "workouts": get_workout_bucket_collection()}
+
+DATE_FIELDS = {"meals": "meal_date", "workouts": "workout_date"}
+
+MIGRATE_BATCH_SIZE = 500
+
+
+def as_stored(date):
+    """
+    Mongo hands back naive UTC datetimes; convert aware ones the same way so
+    freshly inserted documents compare cleanly with fetched ones.
+    """
+    if isinstance(date, datetime) and date.tzinfo is not None:
+        return date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def using_buckets():
+    return Config.LOG_STORAGE == "buckets"
+
+
+def week_of(date):
+    """
+    Start of the bucket holding `date`: the Monday before it, at midnight UTC.
+    """
+    date = as_stored(date)
+    day = datetime(date.year, date.month, date.day)
+    return day - timedelta(days=day.weekday())
+
+
+def bucket_entry(doc):
+    return {key: value for key, value in doc.items() if key != "username"}
+
+
+def insert_log(kind, doc):
+    """
+    Stores one log document (kind is "meals" or "workouts"). `doc` carries
+    the username and gets its `_id` set, as with insert_one.
+    """
+    if not using_buckets():
+        collections[kind].insert_one(doc)
+        return doc
+
+    doc.setdefault("_id", ObjectId())
+    buckets[kind].update_one(
+        {"username": doc["username"], "week": week_of(doc[DATE_FIELDS[kind]])},
+        {"$push": {"entries": bucket_entry(doc)}, "$inc": {"count": 1}},
+        upsert=True
+    )
+    return doc
+
+
+def insert_logs(kind, docs):
+    """
+    Unordered batch insert. Returns (inserted_count, [(index, error), ...])
+    for the documents Mongo rejected.
+    """
+    if not using_buckets():
+        try:
+            return len(collections[kind].insert_many(docs, ordered=False).inserted_ids), []
+        except BulkWriteError as e:
+            failures = [(err["index"], err.get("errmsg", "Write failed")) for err in e.details.get("writeErrors", [])]
+            return e.details.get("nInserted", 0), failures
+
+    # One $push per bucket touched; a failed push fails every log in it
+    per_week = {}
+    for index, doc in enumerate(docs):
+        doc.setdefault("_id", ObjectId())
+        key = (doc["username"], week_of(doc[DATE_FIELDS[kind]]))
+        per_week.setdefault(key, []).append(index)
+
+    groups = list(per_week.values())
+    requests = [
+        UpdateOne(
+            {"username": username, "week": week},
+            {"$push": {"entries": {"$each": [bucket_entry(docs[index]) for index in indexes]}}, "$inc": {"count": len(indexes)}},
+            upsert=True
+        )
+        for (username, week), indexes in per_week.items()
+    ]
+    if not requests:
+        return 0, []
+
+    try:
+        buckets[kind].bulk_write(requests, ordered=False)
+        return len(docs), []
+    except BulkWriteError as e:
+        failures = [
+            (index, err.get("errmsg", "Write failed"))
+            for err in e.details.get("writeErrors", [])
+            for index in groups[err["index"]]
+        ]
+        return len(docs) - len(failures), failures
+
+
+def log_query(kind, username, start=None, end=None, after=None):
+    date_field = DATE_FIELDS[kind]
+    query = {"username": username}
+    if start or end:
+        query[date_field] = {}
+        if start:
+            query[date_field]["$gte"] = start
+        if end:
+            query[date_field]["$lt"] = end
+    if after and after[0] is not None:
+        # Keyset on (date, _id): strictly after the last entry returned
+        date, oid = after
+        query["$or"] = [
+            {date_field: {"$gt": date}},
+            {date_field: date, "_id": {"$gt": oid}}
+        ]
+    return query
+
+
+def bucket_query(username, start=None, end=None, after=None):
+    lower = start
+    if after and after[0] is not None and (lower is None or as_stored(after[0]) > as_stored(lower)):
+        lower = after[0]
+
+    query = {"username": username}
+    if lower or end:
+        query["week"] = {}
+        if lower:
+            query["week"]["$gte"] = week_of(lower)
+        if end:
+            query["week"]["$lt"] = as_stored(end)
+    return query
+
+
+def project(doc, fields):
+    """
+    Applies a Mongo-style projection to a bucket entry. As in Mongo, it's an
+    inclusion projection if any field other than _id is included, and an
+    exclusion projection otherwise.
+    """
+    if fields is None:
+        return doc
+    if any(value for key, value in fields.items() if key != "_id"):
+        included = {key for key, value in fields.items() if value}
+        if fields.get("_id", 1):
+            included.add("_id")
+        return {key: value for key, value in doc.items() if key in included}
+    excluded = {key for key, value in fields.items() if not value}
+    return {key: value for key, value in doc.items() if key not in excluded}
+
+
+def bucket_entries(kind, username, start, end, after, fields):
+    date_field = DATE_FIELDS[kind]
+    start, end = as_stored(start), as_stored(end)
+    position = (as_stored(after[0]), after[1]) if after and after[0] is not None else None
+
+    cursor = buckets[kind].find(bucket_query(username, start, end, after), {"_id": 0, "entries": 1}).sort("week", 1)
+    for bucket in cursor:
+        # Buckets never overlap, so sorting each one keeps the whole stream ordered
+        for entry in sorted(bucket.get("entries", []), key=lambda entry: (entry[date_field], entry["_id"])):
+            date = entry[date_field]
+            if start and date < start:
+                continue
+            if end and date >= end:
+                return
+            if position and (date, entry["_id"]) <= position:
+                continue
+            yield project(entry, fields)
+
+
+def find_logs(kind, username, start=None, end=None, fields=None, after=None, limit=None, batch_size=None):
+    """
+    Iterates the user's logs of `kind` in [start, end) (both bounds optional)
+    ordered by (date, _id). `after` resumes strictly after a (date, _id)
+    position; `fields` is a Mongo projection; `batch_size` tunes the cursor
+    in the documents layout.
+    """
+    if using_buckets():
+        entries = bucket_entries(kind, username, start, end, after, fields)
+        return islice(entries, limit) if limit else entries
+
+    date_field = DATE_FIELDS[kind]
+    cursor = collections[kind].find(log_query(kind, username, start, end, after), fields).sort([(date_field, 1), ("_id", 1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    if batch_size:
+        cursor = cursor.batch_size(batch_size)
+    return cursor
+
+
+def count_logs(kind, username, start=None, end=None):
+    if using_buckets():
+        return sum(1 for _ in find_logs(kind, username, start, end, fields={"_id": 1}))
+    return collections[kind].count_documents(log_query(kind, username, start, end))
+
+
+def migrate():
+    """
+    Copies every meal and workout document into week buckets. Each bucket is
+    rebuilt whole from the documents, so re-running picks up logs written
+    since the last run. Run it before setting LOG_STORAGE=buckets: anything
+    written straight to a bucket would be overwritten. The source collections
+    are left untouched. Returns {kind: (logs, buckets)}.
+    """
+    totals = {}
+    for kind, collection in collections.items():
+        date_field = DATE_FIELDS[kind]
+        logs_copied = buckets_written = 0
+        requests = []
+        key, entries = None, []
+
+        def flush_bucket():
+            if entries:
+                username, week = key
+                requests.append(ReplaceOne(
+                    {"username": username, "week": week},
+                    {"username": username, "week": week, "count": len(entries), "entries": entries},
+                    upsert=True
+                ))
+
+        # Sorted by user then date, so each bucket's logs arrive together
+        cursor = collection.find({}).sort([("username", 1), (date_field, 1), ("_id", 1)]).batch_size(MIGRATE_BATCH_SIZE)
+        for doc in cursor:
+            doc_key = (doc["username"], week_of(doc[date_field]))
+            if doc_key != key:
+                flush_bucket()
+                key, entries = doc_key, []
+                if len(requests) >= MIGRATE_BATCH_SIZE:
+                    buckets[kind].bulk_write(requests, ordered=False)
+                    buckets_written += len(requests)
+                    requests = []
+            entries.append(bucket_entry(doc))
+            logs_copied += 1
+
+        flush_bucket()
+        if requests:
+            buckets[kind].bulk_write(requests, ordered=False)
+            buckets_written += len(requests)
+        totals[kind] = (logs_copied, buckets_written)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the meal and workout storage layout.")
+    parser.add_argument("command", choices=["migrate"], help="migrate: copy meals/workouts into week buckets")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        for kind, (logs_copied, buckets_written) in migrate().items():
+            print(f"{kind}: {logs_copied} logs in {buckets_written} week buckets")
+
+
+if __name__ == "__main__":
+    main()
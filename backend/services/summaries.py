@@ -0,0 +1,175 @@
+"""
+Per-user daily summaries and calendar highlights.
+
+Each (username, day) summary document counts the meals and workouts logged on
+that day, plus the day's calories/protein/carbs/fat from the meals' macro
+index (services/nutrition.py), and is maintained on every write in
+services/logs.py. Highlights for
+the dashboard calendar are either grouped from the log collections by a Mongo
+aggregation (or, with LOG_STORAGE=buckets, from the week buckets) or, with
+HIGHLIGHTS_SOURCE=summaries, read straight from here.
+
+    python -m services.summaries --backfill              # rebuild summaries from the logs
+    python -m services.summaries --backfill --reenrich   # ...re-matching every meal against foods.csv
+"""
+import argparse
+from pymongo import UpdateOne
+from config import Config
+from services.db import get_summary_collection
+from services.nutrition import MACROS, enrich_stored_meals, meal_totals
+from services.storage import DATE_FIELDS, as_stored, buckets, collections, find_logs, using_buckets
+
+summaries = get_summary_collection()
+
+
+def day_key(date):
+    return as_stored(date).strftime("%Y-%m-%d")
+
+
+def record(username, kind, date, count=1, macros=None):
+    """
+    Adds `count` logs of `kind` ("meals" or "workouts") to the user's day,
+    and a meal's macro totals when given.
+    """
+    summaries.update_one(
+        {"username": username, "day": day_key(date)},
+        {"$inc": {kind: count, **(macros or {})}},
+        upsert=True
+    )
+
+
+def record_many(username, kind, docs):
+    date_field = DATE_FIELDS[kind]
+    per_day = {}
+    for doc in docs:
+        increments = per_day.setdefault(day_key(doc[date_field]), {kind: 0})
+        increments[kind] += 1
+        if kind == "meals":
+            for macro, value in meal_totals(doc).items():
+                increments[macro] = increments.get(macro, 0) + value
+    if per_day:
+        summaries.bulk_write([
+            UpdateOne({"username": username, "day": day}, {"$inc": increments}, upsert=True)
+            for day, increments in per_day.items()
+        ], ordered=False)
+
+
+def logged_days(kind, username, start=None, end=None):
+    """
+    Distinct YYYY-MM-DD days with at least one log, grouped server-side.
+    `start` is inclusive and `end` exclusive.
+    """
+    date_field = DATE_FIELDS[kind]
+    if using_buckets():
+        # A window is only a handful of buckets; group their entries here
+        return sorted({day_key(doc[date_field]) for doc in find_logs(kind, username, start, end, fields={"_id": 0, date_field: 1})})
+
+    match = {"username": username}
+    if start or end:
+        match[date_field] = {}
+        if start:
+            match[date_field]["$gte"] = start
+        if end:
+            match[date_field]["$lt"] = end
+
+    pipeline = [
+        {"$match": match},
+        {"$project": {"_id": 0, date_field: 1}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}}}}
+    ]
+    return [doc["_id"] for doc in collections[kind].aggregate(pipeline)]
+
+
+def highlights(username, start=None, end=None):
+    """
+    Returns {"YYYY-MM-DD": {"meals": True, "workouts": True}} for the days in
+    [start, end) that have logs; with no window, the user's whole history.
+    """
+    result = {}
+
+    if Config.HIGHLIGHTS_SOURCE == "summaries":
+        query = {"username": username}
+        if start or end:
+            query["day"] = {}
+            if start:
+                query["day"]["$gte"] = start.strftime("%Y-%m-%d")
+            if end:
+                query["day"]["$lt"] = end.strftime("%Y-%m-%d")
+
+        for summary in summaries.find(query, {"_id": 0, "day": 1, "meals": 1, "workouts": 1}):
+            for kind in DATE_FIELDS:
+                if summary.get(kind, 0) > 0:
+                    result.setdefault(summary["day"], {})[kind] = True
+        return result
+
+    for kind in DATE_FIELDS:
+        for day in logged_days(kind, username, start, end):
+            result.setdefault(day, {})[kind] = True
+    return result
+
+
+def backfill(reenrich=False):
+    """
+    Recomputes every summary document from the logs, in whichever layout
+    LOG_STORAGE selects, first adding the macro index to meals missing it
+    (or to every meal with reenrich=True). Counts are overwritten rather
+    than incremented, so it is safe to re-run.
+    """
+    enrich_stored_meals(force=reenrich)
+
+    for kind in DATE_FIELDS:
+        if using_buckets():
+            collection = buckets[kind]
+            prefix = "entries."
+            pipeline = [{"$unwind": "$entries"}]
+        else:
+            collection = collections[kind]
+            prefix = ""
+            pipeline = []
+
+        sums = {"count": {"$sum": 1}}
+        if kind == "meals":
+            sums.update({macro: {"$sum": f"${prefix}nutrition.totals.{macro}"} for macro in MACROS})
+
+        pipeline += [
+            {"$group": {
+                "_id": {
+                    "username": "$username",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${prefix}{DATE_FIELDS[kind]}"}}
+                },
+                **sums
+            }}
+        ]
+
+        batch = []
+        for group in collection.aggregate(pipeline, allowDiskUse=True):
+            values = {kind: group["count"]}
+            if kind == "meals":
+                values.update({macro: round(group[macro], 1) for macro in MACROS})
+            batch.append(UpdateOne(
+                {"username": group["_id"]["username"], "day": group["_id"]["day"]},
+                {"$set": values},
+                upsert=True
+            ))
+            if len(batch) >= 1000:
+                summaries.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            summaries.bulk_write(batch, ordered=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain per-user daily log summaries.")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild all summaries from meals and workouts")
+    parser.add_argument("--reenrich", action="store_true", help="With --backfill, recompute every meal's macros from foods.csv")
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill(reenrich=args.reenrich)
+        print(f"Rebuilt {summaries.count_documents({})} daily summaries.")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import threading
+import unicodedata
+from elevenlabs.client import ElevenLabs
+from config import Config
+from services.cache import LRUCache
+
+# GymBro's ElevenLabs voice
+VOICE_ID = "TX3LPaxmHKxFdv7VOQHJ"
+MODEL_ID = "eleven_turbo_v2"
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+
+# ElevenLabs output formats offered by /gymbro/audio, by codec and kbps
+OUTPUT_FORMATS = {
+    "mp3": {
+        "mimetype": "audio/mpeg",
+        "default_bitrate": 128,
+        "bitrates": {32: "mp3_22050_32", 64: "mp3_44100_64", 96: "mp3_44100_96", 128: "mp3_44100_128", 192: "mp3_44100_192"}
+    },
+    "opus": {
+        "mimetype": "audio/ogg",
+        "default_bitrate": 64,
+        "bitrates": {32: "opus_48000_32", 64: "opus_48000_64", 96: "opus_48000_96", 128: "opus_48000_128", 192: "opus_48000_192"}
+    }
+}
+
+elevenlabs = ElevenLabs(api_key=Config.EL_API_KEY)
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def negotiate_format(codec=None, bitrate=None, accept=None):
+    """
+    Picks an ElevenLabs output format from an explicit codec/bitrate or the
+    client's Accept header. Bitrates round down to the nearest offered one.
+    Returns (output_format, mimetype); raises ValueError if nothing fits.
+    """
+    if codec is None:
+        codec = "mp3"
+        if accept is not None:
+            best = accept.best_match([spec["mimetype"] for spec in OUTPUT_FORMATS.values()])
+            if best is None and accept.provided:
+                raise ValueError("No supported audio type in Accept header")
+            codec = next((name for name, spec in OUTPUT_FORMATS.items() if spec["mimetype"] == best), "mp3")
+
+    spec = OUTPUT_FORMATS.get(codec)
+    if spec is None:
+        raise ValueError(f"Unsupported audio format '{codec}'. Use one of: {', '.join(OUTPUT_FORMATS)}")
+
+    bitrates = sorted(spec["bitrates"])
+    if bitrate is None:
+        bitrate = spec["default_bitrate"]
+    chosen = max((b for b in bitrates if b <= bitrate), default=bitrates[0])
+
+    return spec["bitrates"][chosen], spec["mimetype"]
+
+
+def cache_key(text, voice_id=VOICE_ID, model_id=MODEL_ID, output_format=DEFAULT_OUTPUT_FORMAT):
+    """
+    Content address for a synthesized reply: identical normalized text in the
+    same voice, model and output format always yields the same audio.
+    """
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{voice_id}-{model_id}-{output_format}-{digest}"
+
+
+class DiskAudioCache:
+    """
+    On-disk tier of the TTS cache. One file per key; when the directory grows
+    past max_bytes the least recently used files are deleted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        try:
+            # Refresh the access time so eviction keeps recently played replies
+            os.utime(path)
+        except OSError:
+            # Evicted since the read; the data is still good
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Stores `data` under `key`. A failed write (e.g. a full disk) just
+        leaves the key uncached; the reply is still served from memory.
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+
+            with self._lock:
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self.size += len(data) - replaced
+                if self.size > self.max_bytes:
+                    self._evict()
+        except OSError:
+            pass
+        finally:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        self.size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.size -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": self.size,
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+memory_cache = LRUCache(Config.TTS_CACHE_MEMORY_BYTES, sizeof=len)
+disk_cache = DiskAudioCache(Config.TTS_CACHE_DIR, Config.TTS_CACHE_DISK_BYTES) if Config.TTS_CACHE_DIR else None
+
+
+def cached_audio(key):
+    audio = memory_cache.get(key)
+    if audio is None and disk_cache is not None:
+        audio = disk_cache.get(key)
+        if audio is not None:
+            memory_cache.put(key, audio)
+    return audio
+
+
+def store_audio(key, audio):
+    memory_cache.put(key, audio)
+    if disk_cache is not None:
+        disk_cache.put(key, audio)
+
+
+def synthesize(text, output_format=DEFAULT_OUTPUT_FORMAT):
+    """
+    Returns the full audio for `text`, calling ElevenLabs only on a cache miss.
+    """
+    key = cache_key(text, output_format=output_format)
+    audio = cached_audio(key)
+    if audio is None:
+        audio = b"".join(elevenlabs.text_to_speech.convert(
+            text=text,
+            voice_id=VOICE_ID,
+            model_id=MODEL_ID,
+            output_format=output_format,
+        ))
+        store_audio(key, audio)
+    return audio
+
+
+def stream(text, output_format=DEFAULT_OUTPUT_FORMAT):
+    """
+    Yields audio chunks for `text`. Hits are served from the cache in one
+    chunk; misses are streamed from ElevenLabs and cached once complete.
+    """
+    key = cache_key(text, output_format=output_format)
+    audio = cached_audio(key)
+    if audio is not None:
+        yield audio
+        return
+
+    chunks = []
+    for chunk in elevenlabs.text_to_speech.stream(
+        text=text,
+        voice_id=VOICE_ID,
+        model_id=MODEL_ID,
+        output_format=output_format,
+    ):
+        if chunk:
+            chunks.append(chunk)
+            yield chunk
+
+    store_audio(key, b"".join(chunks))
+
+
+def cache_stats():
+    memory = memory_cache.stats()
+    disk = disk_cache.stats() if disk_cache is not None else None
+
+    # A lookup reaches the disk tier only after missing in memory
+    lookups = memory["hits"] + memory["misses"]
+    hits = memory["hits"] + (disk["hits"] if disk else 0)
+    return {
+        "memory": memory,
+        "disk": disk,
+        "hit_rate": hits / lookups if lookups else 0.0
+    }
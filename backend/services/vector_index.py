@@ -0,0 +1,189 @@
+"""
+Vector search for /pinecone/query, against Pinecone or a local index.
+
+The local index is written by `python RAG/setup.py --backend local` into
+VECTOR_INDEX_DIR:
+
+    meta.json        {"model", "dim", "count", "dtype": "float32"|"int8"}
+    vectors.bin      count x dim unit-length rows, float32 or int8
+    scales.bin       int8 only: one float32 scale per row (row = int8 * scale)
+    metadata.jsonl   one {"id", "text", "source", "category"} per row
+    hnsw.bin         optional hnswlib graph, written for large corpora
+
+The matrix and metadata.jsonl are memory-mapped, so worker processes share
+one copy through the page cache; only row offsets into the metadata are held
+per worker, and the top-k rows are parsed per query. Exact top-k is a blocked
+matrix-vector product. When the
+build wrote an HNSW graph and hnswlib is installed, search walks the graph
+instead. A rebuild is picked up on the next query.
+"""
+import json
+import mmap
+import os
+import threading
+import numpy as np
+from pinecone import Pinecone
+from config import Config
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+NAMESPACE = "gymbro-data"
+
+# Rows scored per block in exact search; bounds the float32 copy of int8 rows
+SEARCH_BLOCK_ROWS = 65536
+
+
+class LocalIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.count = self.meta["count"]
+        self.dim = self.meta["dim"]
+
+        self.vectors = np.memmap(
+            os.path.join(directory, "vectors.bin"), dtype=self.meta["dtype"], mode="r", shape=(self.count, self.dim)
+        ) if self.count else np.zeros((0, self.dim or 0), dtype=np.float32)
+        self.scales = None
+        if self.meta["dtype"] == "int8":
+            self.scales = np.fromfile(os.path.join(directory, "scales.bin"), dtype=np.float32)
+
+        self.metadata_file = None
+        self.line_starts = np.zeros(0, dtype=np.int64)
+        self.line_ends = np.zeros(0, dtype=np.int64)
+        if self.count:
+            with open(os.path.join(directory, "metadata.jsonl"), "rb") as f:
+                self.metadata_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # One JSON object per line; json.dumps never writes a raw newline
+            newlines = np.flatnonzero(np.frombuffer(self.metadata_file, dtype=np.uint8) == ord("\n"))
+            self.line_starts = np.concatenate(([0], newlines[:-1] + 1))
+            self.line_ends = newlines
+
+        self.graph = None
+        graph_path = os.path.join(directory, "hnsw.bin")
+        if hnswlib is not None and Config.VECTOR_SEARCH != "exact" and os.path.exists(graph_path):
+            self.graph = hnswlib.Index(space="ip", dim=self.dim)
+            self.graph.load_index(graph_path, max_elements=self.count)
+            self.graph.set_ef(max(Config.VECTOR_HNSW_EF, 1))
+
+    def metadata(self, row):
+        """
+        The metadata.jsonl entry for `row`, read from the mapped file.
+        """
+        return json.loads(self.metadata_file[self.line_starts[row]:self.line_ends[row]])
+
+    def scores(self, query):
+        """
+        Cosine similarity of every row with the unit-length `query`.
+        """
+        scores = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search(self, vector, top_k, exact=False):
+        """
+        The `top_k` nearest rows to `vector`, best first, shaped like
+        Pinecone matches.
+        """
+        top_k = min(top_k, self.count)
+        if top_k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if self.graph is not None and not exact:
+            rows, distances = self.graph.knn_query(query, k=top_k)
+            rows, scores = rows[0], 1 - distances[0]
+        else:
+            all_scores = self.scores(query)
+            rows = np.argpartition(-all_scores, top_k - 1)[:top_k]
+            rows = rows[np.argsort(-all_scores[rows], kind="stable")]
+            scores = all_scores[rows]
+
+        matches = []
+        for row, score in zip(rows, scores):
+            entry = self.metadata(row)
+            matches.append({
+                "id": entry["id"],
+                "score": float(score),
+                "metadata": {key: value for key, value in entry.items() if key != "id"}
+            })
+        return matches
+
+
+_local = None
+_local_mtime = None
+_local_lock = threading.Lock()
+
+
+def local_index():
+    """
+    The local index, loaded on first use and reloaded when a rebuild
+    replaces meta.json.
+    """
+    global _local, _local_mtime
+    try:
+        mtime = os.stat(os.path.join(Config.VECTOR_INDEX_DIR, "meta.json")).st_mtime_ns
+    except OSError:
+        # Mid-swap during a rebuild; keep serving the previous build
+        if _local is not None:
+            return _local
+        raise FileNotFoundError(f"No local vector index in {Config.VECTOR_INDEX_DIR}; run `python RAG/setup.py --backend local`")
+
+    if _local is None or mtime != _local_mtime:
+        with _local_lock:
+            if _local is None or mtime != _local_mtime:
+                _local = LocalIndex(Config.VECTOR_INDEX_DIR)
+                _local_mtime = mtime
+    return _local
+
+
+_pinecone = None
+
+
+def pinecone_index():
+    global _pinecone
+    if _pinecone is None:
+        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        _pinecone = pc.Index(host=os.getenv("PINECONE_INDEX"))
+    return _pinecone
+
+
+def query_pinecone(vector, top_k):
+    response = pinecone_index().query(
+        namespace=NAMESPACE,
+        vector=vector,
+        top_k=top_k,
+        include_metadata=True,
+        include_values=False
+    )
+    return [
+        {
+            "id": match["id"],
+            "score": match["score"],
+            "metadata": match.get("metadata", {})
+        }
+        for match in response.get("matches", [])
+    ]
+
+
+def search(vector, top_k, backend=None):
+    """
+    Top-k matches from the configured backend (or `backend`, when given).
+    """
+    backend = backend or Config.VECTOR_BACKEND
+    if backend == "local":
+        return local_index().search(vector, top_k)
+    if backend == "pinecone":
+        return query_pinecone(vector, top_k)
+    raise ValueError(f"Unknown vector backend '{backend}'")
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+import time
+from datetime import date
+from functools import wraps
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+from pymongo import ReturnDocument
+from config import Config
+from services.compression import GZIP_ETAG_SUFFIX
+from services.db import get_user_collection
+
+# Per-user data version, bumped on every write that changes what the profile
+# and log read endpoints return. Read endpoints derive their ETag from it, so
+# an unchanged read can be answered with 304 without running the view.
+#
+# Staleness: the version is cached in-process for DATA_VERSION_TTL seconds so
+# a 304 costs no Mongo read at all. A write is seen at once by the worker that
+# made it; other workers can keep answering 304 (or serving per-version caches
+# such as services/analytics.py) for up to DATA_VERSION_TTL after it.
+
+users = get_user_collection()
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def current_version(username):
+    """
+    The user's data version, cached in-process for DATA_VERSION_TTL seconds.
+    Bumps made by this process are seen immediately; bumps from other worker
+    processes within the TTL.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _versions.get(username)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    user = users.find_one({"username": username}, {"_id": 0, "data_version": 1}) or {}
+    version = user.get("data_version", 0)
+    with _lock:
+        _versions[username] = (version, now + Config.DATA_VERSION_TTL)
+    return version
+
+
+def bump(username):
+    user = users.find_one_and_update(
+        {"username": username},
+        {"$inc": {"data_version": 1}},
+        projection={"_id": 0, "data_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if user:
+        with _lock:
+            _versions[username] = (user["data_version"], time.monotonic() + Config.DATA_VERSION_TTL)
+
+
+def conditional(daily=False):
+    """
+    Decorator for JWT-protected GET views whose output depends only on the
+    user's data (and, with daily=True, on today's date). Answers 304 when the
+    client's If-None-Match still matches; otherwise tags the fresh response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            username = get_jwt_identity()
+            version = current_version(username)
+            parts = [username, str(version), request.full_path]
+            if daily:
+                parts.append(date.today().isoformat())
+            etag = hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+            # The client may hold the gzipped variant (services/compression.py);
+            # answer with the tag it sent
+            matched = next((tag for tag in (etag, etag + GZIP_ETAG_SUFFIX) if request.if_none_match.contains(tag)), None)
+            if matched:
+                response = make_response("", 304)
+                response.set_etag(matched)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# Tests import modules the way the app does, rooted at backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# API clients are built at import time; they only need some key to construct
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+def load_rag_setup():
+    """
+    RAG/setup.py is a standalone script, not a package module; load it by path.
+    """
+    import importlib.util
+    path = os.path.join(os.path.dirname(__file__), "..", "RAG", "setup.py")
+    spec = importlib.util.spec_from_file_location("rag_setup", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
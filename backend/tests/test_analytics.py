@@ -0,0 +1,27 @@
+import pytest
+from services.analytics import muscle_group
+
+
+@pytest.mark.parametrize("name, group", [
+    ("hip abduction", "glutes"),
+    ("abductor machine", "glutes"),
+    ("back extension", "back"),
+    ("tricep dips", "triceps"),
+    ("dips", "chest"),
+    ("lateral lunge", "legs"),
+    ("lateral raises", "shoulders"),
+    ("lat pulldown", "back"),
+    ("rowing", "cardio"),
+    ("bent over rows", "back"),
+    ("abs", "core"),
+    ("crunches", "core"),
+    ("push ups", "chest"),
+    ("dumbbell flyes", "chest"),
+    ("calves", "legs"),
+    ("hammer curls", "biceps"),
+    ("running", "cardio"),
+    ("cycling", "cardio"),
+    ("stretching", "other"),
+])
+def test_muscle_group(name, group):
+    assert muscle_group(name) == group
@@ -0,0 +1,53 @@
+import io
+from config import Config
+from services import bulk_import
+
+MEAL = b'{"kind": "meal", "date": "2024-03-01T08:00:00Z", "type": "breakfast", "items": ["2 eggs"]}\n'
+
+
+def run_import(monkeypatch, body, fmt="ndjson"):
+    inserted = []
+
+    def fake_insert_batch(username, kind, docs):
+        inserted.extend(docs)
+        return len(docs), []
+
+    monkeypatch.setattr(bulk_import, "insert_batch", fake_insert_batch)
+    return bulk_import.import_logs("alex", io.BytesIO(body), fmt).to_dict(), inserted
+
+
+def test_iter_lines_rejects_long_lines_without_buffering_them(monkeypatch):
+    monkeypatch.setattr(bulk_import, "READ_CHUNK_BYTES", 4)
+    body = b"short\n" + b"x" * 50 + b"\nok\n" + b"y" * 50
+
+    assert list(bulk_import.iter_lines(io.BytesIO(body), 10)) == [b"short\n", None, b"ok\n", None]
+
+
+def test_bad_utf8_line_is_reported_and_the_rest_imported(monkeypatch):
+    result, inserted = run_import(monkeypatch, MEAL + b'{"kind": "meal", "notes": "\xff"}\n' + MEAL)
+
+    assert result["inserted"] == 2
+    assert result["errors"] == [{"line": 2, "error": "Line is not valid UTF-8"}]
+    assert len(inserted) == 2
+
+
+def test_overlong_line_is_reported_per_line(monkeypatch):
+    monkeypatch.setattr(Config, "BULK_MAX_LINE_BYTES", len(MEAL))
+    result, _ = run_import(monkeypatch, MEAL + b" " * (len(MEAL) + 1) + b"\n" + MEAL)
+
+    assert result["inserted"] == 2
+    assert result["errors"] == [{"line": 2, "error": f"Line longer than {len(MEAL)} bytes"}]
+
+
+def test_bad_utf8_csv_row_is_reported_with_its_line(monkeypatch):
+    body = (
+        b"kind,date,type,items,activities,notes\n"
+        b"meal,2024-03-01T08:00:00Z,breakfast,2 eggs,,\n"
+        b"meal,2024-03-01T12:00:00Z,lunch,\xff,,\n"
+        b"meal,2024-03-01T19:00:00Z,dinner,rice,,\n"
+    )
+    result, inserted = run_import(monkeypatch, body, fmt="csv")
+
+    assert result["inserted"] == 2
+    assert result["errors"] == [{"line": 3, "error": "Line is not valid UTF-8"}]
+    assert [doc["meal_type"] for doc in inserted] == ["breakfast", "dinner"]
@@ -0,0 +1,44 @@
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from services import versions
+from services.compression import init_compression
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-for-signing-tokens"
+    JWTManager(app)
+    init_compression(app)
+
+    @app.route("/data")
+    @jwt_required()
+    @versions.conditional()
+    def data():
+        return jsonify({"items": ["squat"] * 1000})
+
+    with app.app_context():
+        token = create_access_token(identity="alex")
+    return app.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def test_gzip_and_identity_bodies_get_different_etags(monkeypatch):
+    monkeypatch.setattr(versions, "current_version", lambda username: 1)
+    client, headers = make_app()
+
+    identity = client.get("/data", headers=headers)
+    gzipped = client.get("/data", headers={**headers, "Accept-Encoding": "gzip"})
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == identity.headers["ETag"][:-1] + '-gzip"'
+
+
+def test_either_etag_revalidates(monkeypatch):
+    monkeypatch.setattr(versions, "current_version", lambda username: 1)
+    client, headers = make_app()
+
+    for accept in ("identity", "gzip"):
+        first = client.get("/data", headers={**headers, "Accept-Encoding": accept})
+        again = client.get("/data", headers={**headers, "Accept-Encoding": accept, "If-None-Match": first.headers["ETag"]})
+
+        assert again.status_code == 304
+        assert again.headers["ETag"] == first.headers["ETag"]
@@ -0,0 +1,44 @@
+import sqlite3
+import pytest
+
+embeddings = pytest.importorskip("services.embeddings")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return embeddings.SqliteEmbeddingCache(str(tmp_path / "embeddings.sqlite3"), 100)
+
+
+def used(cache, key):
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute("SELECT used FROM embeddings WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_overwrite_is_not_counted_as_a_new_entry(cache):
+    cache.put("a", [1.0, 2.0])
+    cache.put("a", [3.0, 4.0])
+
+    assert cache.stats()["entries"] == 1
+    assert cache.get("a") == [3.0, 4.0]
+
+
+def test_hit_only_refreshes_stale_used_times(cache, monkeypatch):
+    cache.put("a", [1.0])
+    stored = used(cache, "a")
+
+    cache.get("a")
+    assert used(cache, "a") == stored
+
+    monkeypatch.setattr(embeddings.time, "time", lambda: stored + embeddings.USED_REFRESH_SECONDS + 1)
+    cache.get("a")
+    assert used(cache, "a") == stored + embeddings.USED_REFRESH_SECONDS + 1
+
+
+def test_sqlite_errors_are_misses(cache):
+    cache.put("a", [1.0])
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("DROP TABLE embeddings")
+
+    assert cache.get("a") is None
+    cache.put("b", [1.0])
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from services import bulk_import, logs
+
+MEALS = [
+    {"meal_date": datetime(2024, 3, 1, 8), "meal_type": "breakfast", "meal_items": ["2 eggs", "toast"]},
+    {"meal_date": datetime(2024, 3, 2, 12), "meal_type": "lunch", "meal_items": ["rice"]}
+]
+WORKOUTS = [
+    {
+        "workout_date": datetime(2024, 3, 1, 17),
+        "workout_type": "push day",
+        "workout_activities": [{"name": "bench press", "mode": "reps", "sets": 3, "reps": 10}],
+        "notes": ""
+    }
+]
+
+
+def fake_find_logs(kind, username, start=None, end=None, fields=None, after=None, limit=None, batch_size=None):
+    return iter({"meals": MEALS, "workouts": WORKOUTS}[kind])
+
+
+def test_export_mixes_meals_and_workouts_in_date_order(monkeypatch):
+    monkeypatch.setattr(logs, "find_logs", fake_find_logs)
+
+    records = [json.loads(line) for line in bulk_import.export_ndjson("alex")]
+
+    assert [(record["kind"], record["date"]) for record in records] == [
+        ("meal", "2024-03-01T08:00:00Z"),
+        ("workout", "2024-03-01T17:00:00Z"),
+        ("meal", "2024-03-02T12:00:00Z")
+    ]
+    assert records[0]["items"] == ["2 eggs", "toast"]
+    assert records[1]["activities"][0]["name"] == "bench press"
+
+
+def test_csv_export_labels_each_kind(monkeypatch):
+    monkeypatch.setattr(logs, "find_logs", fake_find_logs)
+
+    lines = "".join(bulk_import.export_csv("alex")).splitlines()
+
+    assert lines[0] == "kind,date,type,items,activities,notes"
+    assert [line.split(",")[0] for line in lines[1:]] == ["meal", "workout", "meal"]
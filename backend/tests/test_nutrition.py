@@ -0,0 +1,22 @@
+from services.nutrition import enrich_meal, parse_item
+
+
+def test_digits_inside_a_word_are_not_a_quantity():
+    assert parse_item("2 eggs")["grams"] == 100
+    assert parse_item("200g rice")["grams"] == 200
+    assert parse_item("v8 juice")["grams"] == 248
+
+
+def test_multi_food_items_count_every_food():
+    nutrition = enrich_meal(["200g chicken breast and 1 cup rice", "oats with milk, banana"])
+
+    assert [item["food"] for item in nutrition["items"]] == ["chicken breast", "rice", "rolled oats", "milk", "banana"]
+    assert [item["grams"] for item in nutrition["items"]][:2] == [200, 158]
+    assert nutrition["unmatched"] == 0
+
+
+def test_unknown_part_counts_as_unmatched():
+    nutrition = enrich_meal(["rice and zzyzx"])
+
+    assert [item["food"] for item in nutrition["items"]] == ["rice", None]
+    assert nutrition["unmatched"] == 1
@@ -0,0 +1,167 @@
+"""
+explain() every query shape the routes and services run and fail on a
+collection scan. Runs against a scratch database on MONGODB_URI (or a local
+mongod) and is skipped when no server is reachable.
+"""
+import os
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from services.indexes import INDEXES
+from services.nutrition import MACROS
+
+AUDIT_DATABASE = "gymbro_query_plan_audit"
+
+USERNAME = "audit-user"
+NOW = datetime(2024, 3, 8)
+WEEK_AGO = NOW - timedelta(days=7)
+DAY = WEEK_AGO.strftime("%Y-%m-%d")
+TODAY = NOW.strftime("%Y-%m-%d")
+
+
+def logged_days_pipeline(date_field):
+    # services.summaries.logged_days in the documents layout
+    return [
+        {"$match": {"username": USERNAME, date_field: {"$gte": WEEK_AGO, "$lt": NOW}}},
+        {"$project": {"_id": 0, date_field: 1}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}}}}
+    ]
+
+
+def backfill_pipeline(date_field, prefix="", unwind=False):
+    # services.summaries.backfill; it reads every log, so a scan is expected
+    sums = {"count": {"$sum": 1}}
+    if date_field == "meal_date":
+        sums.update({macro: {"$sum": f"${prefix}nutrition.totals.{macro}"} for macro in MACROS})
+    return ([{"$unwind": "$entries"}] if unwind else []) + [
+        {"$group": {
+            "_id": {"username": "$username", "day": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${prefix}{date_field}"}}},
+            **sums
+        }}
+    ]
+
+
+def range_page(date_field):
+    return {
+        "username": USERNAME,
+        date_field: {"$gte": WEEK_AGO, "$lt": NOW},
+        "$or": [{date_field: {"$gt": WEEK_AGO}}, {date_field: WEEK_AGO, "_id": {"$gt": ObjectId()}}]
+    }
+
+
+# (collection, description, filter or aggregation pipeline, sort). Keep this
+# in step with routes/ and services/ when adding queries.
+QUERY_SHAPES = [
+    ("users", "user by username", {"username": USERNAME}, None),
+    ("users", "reply audio lookup", {"username": USERNAME, "recent_replies.id": "resp_audit"}, None),
+    ("meals", "meals since date", {"username": USERNAME, "meal_date": {"$gte": WEEK_AGO}}, None),
+    ("meals", "meals on a day", {"username": USERNAME, "meal_date": {"$gte": WEEK_AGO, "$lte": NOW}}, None),
+    ("meals", "all meals for user", {"username": USERNAME}, None),
+    ("meals", "meals export", {"username": USERNAME}, [("meal_date", 1), ("_id", 1)]),
+    ("meals", "meals range page", range_page("meal_date"), [("meal_date", 1), ("_id", 1)]),
+    ("meals", "meal logged days", logged_days_pipeline("meal_date"), None),
+    ("workouts", "workouts since date", {"username": USERNAME, "workout_date": {"$gte": WEEK_AGO}}, None),
+    ("workouts", "workouts on a day", {"username": USERNAME, "workout_date": {"$gte": WEEK_AGO, "$lte": NOW}}, None),
+    ("workouts", "all workouts for user", {"username": USERNAME}, None),
+    ("workouts", "workouts export", {"username": USERNAME}, [("workout_date", 1), ("_id", 1)]),
+    ("workouts", "workouts range page", range_page("workout_date"), [("workout_date", 1), ("_id", 1)]),
+    ("workouts", "workout logged days", logged_days_pipeline("workout_date"), None),
+    ("daily_summaries", "summary upsert", {"username": USERNAME, "day": DAY}, None),
+    ("daily_summaries", "highlights from summaries", {"username": USERNAME, "day": {"$gte": DAY, "$lt": TODAY}}, None),
+    ("daily_summaries", "nutrition summary", {"username": USERNAME, "day": {"$gte": DAY, "$lt": TODAY}}, None),
+    ("meal_buckets", "meal buckets in window", {"username": USERNAME, "week": {"$gte": WEEK_AGO, "$lt": NOW}}, [("week", 1)]),
+    ("meal_buckets", "meal bucket push", {"username": USERNAME, "week": WEEK_AGO}, None),
+    ("workout_buckets", "workout buckets in window", {"username": USERNAME, "week": {"$gte": WEEK_AGO, "$lt": NOW}}, [("week", 1)]),
+    ("workout_buckets", "workout bucket push", {"username": USERNAME, "week": WEEK_AGO}, None),
+]
+
+# Whole-collection passes; explained to check they still run, but a scan is the point
+FULL_SCANS = [
+    ("meals", "meals backfill", backfill_pipeline("meal_date"), None),
+    ("workouts", "workouts backfill", backfill_pipeline("workout_date"), None),
+    ("meal_buckets", "meal buckets backfill", backfill_pipeline("meal_date", "entries.", unwind=True), None),
+    ("workout_buckets", "workout buckets backfill", backfill_pipeline("workout_date", "entries.", unwind=True), None),
+]
+
+PLACEHOLDERS = {
+    "users": {"username": "placeholder"},
+    "meals": {"username": "placeholder", "meal_date": NOW},
+    "workouts": {"username": "placeholder", "workout_date": NOW},
+    "daily_summaries": {"username": "placeholder", "day": TODAY},
+    "meal_buckets": {"username": "placeholder", "week": NOW},
+    "workout_buckets": {"username": "placeholder", "week": NOW}
+}
+
+
+@pytest.fixture(scope="module")
+def database():
+    client = MongoClient(os.getenv("MONGODB_URI") or "mongodb://localhost:27017", serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("No MongoDB server reachable")
+
+    client.drop_database(AUDIT_DATABASE)
+    database = client[AUDIT_DATABASE]
+    for name, indexes in INDEXES.items():
+        database[name].create_indexes(indexes)
+        # An empty collection explains as EOF whatever the indexes
+        database[name].insert_one(PLACEHOLDERS[name])
+    yield database
+    client.drop_database(AUDIT_DATABASE)
+    client.close()
+
+
+def explain(database, name, query, sort):
+    if isinstance(query, list):
+        return database.command("aggregate", name, pipeline=query, explain=True)
+    cursor = database[name].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor.explain()
+
+
+def winning_plans(explained):
+    """
+    Every winningPlan in an explain() result; aggregations nest theirs
+    under each $cursor stage or shard.
+    """
+    if isinstance(explained, dict):
+        for key, value in explained.items():
+            if key == "winningPlan":
+                yield value
+            else:
+                yield from winning_plans(value)
+    elif isinstance(explained, list):
+        for value in explained:
+            yield from winning_plans(value)
+
+
+def plan_stages(plan):
+    """
+    Yields every stage name in an explain() plan tree.
+    """
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+@pytest.mark.parametrize("name, description, query, sort", QUERY_SHAPES, ids=[shape[1] for shape in QUERY_SHAPES])
+def test_query_shape_uses_an_index(database, name, description, query, sort):
+    stages = [stage for plan in winning_plans(explain(database, name, query, sort)) for stage in plan_stages(plan)]
+
+    assert stages, f"No query plan for {description}"
+    assert "COLLSCAN" not in stages, f"COLLSCAN on {name} ({description}): {' <- '.join(stages)}"
+
+
+@pytest.mark.parametrize("name, description, query, sort", FULL_SCANS, ids=[shape[1] for shape in FULL_SCANS])
+def test_full_scan_pipelines_run(database, name, description, query, sort):
+    assert explain(database, name, query, sort)
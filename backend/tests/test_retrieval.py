@@ -0,0 +1,55 @@
+import pytest
+from config import Config
+from services import retrieval
+from services.lexical_index import LexicalIndex
+from conftest import load_rag_setup
+
+COMMON = [
+    "What you eat before training matters: eat carbs and protein two hours before training.",
+    "Eat a balanced meal after training to recover and eat enough protein across the day.",
+    "Training volume should rise slowly; eat enough to support training.",
+    "Eat vegetables with every meal, and keep training consistent week to week."
+]
+FILLER = [f"Filler passage {i} about sleep, hydration and general recovery habits." for i in range(36)]
+RARE = ["Creatine monohydrate at 3-5 g per day improves strength and power output."]
+
+
+@pytest.fixture(scope="module")
+def lexical(tmp_path_factory):
+    for module in ("fitz", "langchain", "langchain_openai", "pinecone", "tqdm"):
+        pytest.importorskip(module)
+    setup = load_rag_setup()
+
+    directory = str(tmp_path_factory.mktemp("lexical") / "index")
+    builder = setup.LexicalIndexBuilder(directory)
+    chunks = [
+        {"id": f"c{i}", "text": text, "source": "Test", "category": "test"}
+        for i, text in enumerate(COMMON + FILLER + RARE)
+    ]
+    for _ in builder.collect(chunks):
+        pass
+    builder.commit()
+    return LexicalIndex(directory)
+
+
+def test_common_words_do_not_take_the_fast_path(lexical):
+    results = lexical.search("what should I eat before training", Config.RAG_CANDIDATES)
+
+    assert len(results) >= 4
+    assert not retrieval.strong_keyword_match(results)
+
+
+def test_single_rare_term_takes_the_fast_path(lexical):
+    results = lexical.search("creatine", Config.RAG_CANDIDATES)
+
+    assert [match["id"] for match in results] == [f"c{len(COMMON) + len(FILLER)}"]
+    assert retrieval.strong_keyword_match(results)
+
+
+def test_gate_needs_both_a_rare_term_and_a_high_score():
+    rare_but_weak = [{"id": "a", "score": Config.RAG_LEXICAL_MIN_SCORE / 2, "rarest_idf": Config.RAG_LEXICAL_MIN_IDF + 1}]
+    strong_but_common = [{"id": "a", "score": Config.RAG_LEXICAL_MIN_SCORE * 4, "rarest_idf": Config.RAG_LEXICAL_MIN_IDF / 2}]
+
+    assert not retrieval.strong_keyword_match([])
+    assert not retrieval.strong_keyword_match(rare_but_weak)
+    assert not retrieval.strong_keyword_match(strong_but_common)
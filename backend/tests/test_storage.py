@@ -0,0 +1,61 @@
+from datetime import datetime
+from bson import ObjectId
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from config import Config
+from routes.logging import logging_bp
+from services import storage, versions
+
+
+class FakeCursor(list):
+    def sort(self, *args, **kwargs):
+        return self
+
+
+class FakeBuckets:
+    def __init__(self, bucket_docs):
+        self.bucket_docs = bucket_docs
+
+    def find(self, query, projection=None):
+        return FakeCursor(doc for doc in self.bucket_docs if doc["username"] == query["username"])
+
+
+def bucket(week, entries):
+    return {"username": "alex", "week": week, "count": len(entries), "entries": entries}
+
+
+def test_exclusion_projection_keeps_other_fields():
+    entry = {"_id": ObjectId(), "meal_date": datetime(2024, 3, 5), "meal_type": "lunch", "meal_items": ["rice"]}
+
+    assert storage.project(entry, {"_id": 0}) == {"meal_date": datetime(2024, 3, 5), "meal_type": "lunch", "meal_items": ["rice"]}
+    assert storage.project(entry, {"_id": 0, "meal_type": 1}) == {"meal_type": "lunch"}
+    assert storage.project(entry, {"meal_type": 1}) == {"_id": entry["_id"], "meal_type": "lunch"}
+
+
+def test_by_date_reads_buckets(monkeypatch):
+    monday = datetime(2024, 3, 4)
+    monkeypatch.setattr(Config, "LOG_STORAGE", "buckets")
+    monkeypatch.setattr(versions, "current_version", lambda username: 1)
+    monkeypatch.setitem(storage.buckets, "meals", FakeBuckets([bucket(monday, [
+        {"_id": ObjectId(), "meal_date": datetime(2024, 3, 5, 8), "meal_type": "breakfast", "meal_items": ["2 eggs"]},
+        {"_id": ObjectId(), "meal_date": datetime(2024, 3, 6, 8), "meal_type": "breakfast", "meal_items": ["oats"]}
+    ])]))
+    monkeypatch.setitem(storage.buckets, "workouts", FakeBuckets([bucket(monday, [
+        {"_id": ObjectId(), "workout_date": datetime(2024, 3, 5, 17), "workout_type": "legs",
+         "workout_activities": [{"name": "squat", "mode": "reps", "sets": 5, "reps": 5}], "notes": ""}
+    ])]))
+
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-for-signing-tokens"
+    JWTManager(app)
+    app.register_blueprint(logging_bp, url_prefix="/log")
+    with app.app_context():
+        token = create_access_token(identity="alex")
+
+    response = app.test_client().get("/log/by-date?date=2024-03-05", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "meals": [{"category": "breakfast", "items": ["2 eggs"]}],
+        "workouts": [{"name": "squat", "mode": "reps", "sets": 5, "reps": 5}]
+    }
@@ -0,0 +1,32 @@
+import os
+import pytest
+
+# Needs the ElevenLabs client installed, though nothing here calls it
+tts = pytest.importorskip("services.tts")
+
+
+def test_failed_write_leaves_no_temp_file_and_misses(tmp_path, monkeypatch):
+    cache = tts.DiskAudioCache(str(tmp_path), 1024)
+
+    def full_disk(src, dst):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(tts.os, "replace", full_disk)
+    cache.put("reply", b"audio")
+
+    assert os.listdir(tmp_path) == []
+    assert cache.get("reply") is None
+    assert cache.size == 0
+
+
+def test_hit_survives_eviction_after_read(tmp_path, monkeypatch):
+    cache = tts.DiskAudioCache(str(tmp_path), 1024)
+    cache.put("reply", b"audio")
+
+    def evicted(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(tts.os, "utime", evicted)
+
+    assert cache.get("reply") == b"audio"
+    assert cache.hits == 1
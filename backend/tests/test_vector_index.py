@@ -0,0 +1,31 @@
+import json
+import numpy as np
+import pytest
+
+vector_index = pytest.importorskip("services.vector_index")
+
+
+def write_index(directory, entries, vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    with open(directory / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"model": "test", "dim": vectors.shape[1], "count": len(vectors), "dtype": "float32"}, f)
+    vectors.tofile(directory / "vectors.bin")
+    with open(directory / "metadata.jsonl", "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def test_search_reads_metadata_for_the_top_rows(tmp_path):
+    entries = [
+        {"id": "a", "text": "line one\nline two", "source": "x.pdf"},
+        {"id": "b", "text": "squats", "source": "y.pdf"},
+        {"id": "c", "text": "näive", "source": "z.pdf"}
+    ]
+    write_index(tmp_path, entries, [[1, 0], [0, 1], [0.6, 0.8]])
+    index = vector_index.LocalIndex(str(tmp_path))
+
+    matches = index.search([0, 1], 2, exact=True)
+
+    assert [match["id"] for match in matches] == ["b", "c"]
+    assert matches[1]["metadata"] == {"text": "näive", "source": "z.pdf"}
+    assert index.metadata(0)["text"] == "line one\nline two"
@@ -0,0 +1,31 @@
+"""
+Production entry point for the backend.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With SERVER_MODE=async each worker runs gevent: the sync OpenAI, ElevenLabs,
+Pinecone, requests and pymongo clients all yield on network I/O, so a single
+process keeps hundreds of /gymbro, /agent and /pinecone requests in flight
+instead of one per worker. Running this file directly serves the same app on
+gevent's WSGI server for local use.
+"""
+import os
+
+# Patching must come before any other import (config pulls in dotenv, which
+# imports threading), so this reads the real environment rather than .env:
+# set SERVER_MODE=sync there to skip it. Same default as Config.SERVER_MODE.
+if os.environ.get("SERVER_MODE", "async") == "async":
+    from gevent import monkey
+    monkey.patch_all()
+
+from config import Config
+from app import create_app
+
+app = create_app()
+
+if __name__ == "__main__":
+    if Config.SERVER_MODE == "async":
+        from gevent.pywsgi import WSGIServer
+        WSGIServer((Config.SERVER_HOST, Config.SERVER_PORT), app).serve_forever()
+    else:
+        app.run(host=Config.SERVER_HOST, port=Config.SERVER_PORT, threaded=True)
@@ -1,5 +1,5 @@
 import { useState, useRef, useCallback } from "react"
-import { getNutritionLogs, getWorkoutLogs, agentLogMeal, agentLogWorkout, getContextFromPinecone,sessionId } from "../services/api"
+import { getUserContext, agentLogMeal, agentLogWorkout, getContextFromPinecone,sessionId } from "../services/api"
 import { Mic, MicOff } from "lucide-react"
 
 export default function RealtimeTemplate() {
@@ -32,20 +32,21 @@ export default function RealtimeTemplate() {
     // }
     {
       type: "function",
-      name: "get_nutrition_logs",
-      description: "In order to advice the user well nutritionally you can fetch the user's nutrition logs from the past 7 days in formatted text.",
+      name: "get_user_context",
+      description: "Fetches the user's profile plus their meal and workout logs, grouped by date, in one call. Use it before giving personalized nutrition or training advice.",
       parameters: {
         type: "object",
-        properties: {}
-      }
-    },
-    {
-      type: "function",
-      name: "get_workout_logs",
-      description: "In order to advice the user well nutritionally you can fetch the user's workout logs from the past 7 days in formatted text.",
-      parameters: {
-        type: "object",
-        properties: {}
+        properties: {
+          sections: {
+            type: "array",
+            items: { type: "string", enum: ["profile", "meals", "workouts"] },
+            description: "Which parts to fetch. Defaults to all of them."
+          },
+          days: {
+            type: "integer",
+            description: "How many past days of logs to include (1-30). Defaults to 7."
+          }
+        }
       }
     },
     {
@@ -188,29 +189,13 @@ export default function RealtimeTemplate() {
     //   // Your function logic here
     //   return { result: "success" };
     // }
-    get_nutrition_logs: async () => {
-      try {
-        const response = await getNutritionLogs();
-        console.log(response);
-      
-
-        return {
-          result: response.data.log
-        };
-      } catch (error) {
-        return {
-          error: error.message
-        };
-      }
-    }, 
-    get_workout_logs: async () => {
+    get_user_context: async (args) => {
       try {
-        const response = await getWorkoutLogs();
-        console.log(response);
-      
+        const { sections, days } = JSON.parse(args || "{}");
+        const response = await getUserContext(sections, days);
 
         return {
-          result: response.data.log
+          result: response.data
         };
       } catch (error) {
         return {
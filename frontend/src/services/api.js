@@ -71,8 +71,14 @@ export async function logout() {
 
 
 //Chat endpoints
-export async function chat(m) {
-  return client.post("/gymbro/chat", { message: m });
+// audio: "inline" (default), "deferred" (fetch later with getReplyAudio) or "none"
+export async function chat(m, audio = "inline") {
+  return client.post("/gymbro/chat", { message: m, audio });
+}
+
+export async function getReplyAudio(replyId, format = "mp3", bitrate = null) {
+  const params = bitrate ? { format, bitrate } : { format };
+  return client.get(`/gymbro/audio/${replyId}`, { params, responseType: "blob" });
 }
 
 export async function removeLastMessageID() {
@@ -100,11 +106,30 @@ export async function getLogsByDate(date = null) {
 
 }
 
+// start/end: "YYYY-MM-DD" (inclusive); pass the previous page's next_cursor to continue
+export async function getLogsInRange(start, end, cursor = null, limit = 50) {
+  const params = cursor ? { start, end, limit, cursor } : { start, end, limit };
+  return client.get("/log/range", { params });
+}
+
+// month: "YYYY-MM"
+export async function getCalendarHighlights(month) {
+  return client.get("/log/by-date", { params: { month } });
+}
+
 //profile endpoints
 export async function getUserStats() {
   return client.get("/profile/stats");
 }
 
+export async function getNutritionSummary(days = 7) {
+  return client.get("/profile/nutrition", { params: { days } });
+}
+
+export async function getTrainingAnalytics(weeks = 8) {
+  return client.get("/profile/analytics", { params: { weeks } });
+}
+
 //voice agent endpoints
 export async function getNutritionLogs() {
   return client.get("/agent/nutrition_advice")
@@ -114,6 +139,13 @@ export async function getWorkoutLogs() {
   return client.get("/agent/workout_advice")
 }
 
+export async function getUserContext(sections = null, days = null) {
+  const params = {};
+  if (sections) params.sections = sections.join(",");
+  if (days) params.days = days;
+  return client.get("/agent/context", { params });
+}
+
 export async function agentLogMeal(payload) {
   return client.post("/agent/log_meal", payload); 
 }
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react"
 import Calendar from "react-calendar"
-import { getUserStats, getLogsByDate } from "../services/api"
+import { getUserStats, getLogsByDate, getCalendarHighlights } from "../services/api"
 import {
   Activity,
   TrendingUp,
@@ -17,11 +17,15 @@ import {
 
 import "./calendar-styles.css"
 
+// "YYYY-MM" in local time, matching the month the calendar shows
+const monthKey = (date) => `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, "0")}`
+
 export default function DashboardPage() {
   const [stats, setStats] = useState(null)
   const [selectedDate, setSelectedDate] = useState(new Date())
   const [logs, setLogs] = useState({ meals: [], workouts: [] })
   const [calendarHighlights, setCalendarHighlights] = useState({})
+  const [calendarMonth, setCalendarMonth] = useState(monthKey(new Date()))
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
@@ -42,14 +46,14 @@ export default function DashboardPage() {
   useEffect(() => {
     async function fetchHighlights() {
       try {
-        const res = await getLogsByDate()
-        setCalendarHighlights(res.data)
+        const res = await getCalendarHighlights(calendarMonth)
+        setCalendarHighlights((prev) => ({ ...prev, ...res.data }))
       } catch (err) {
         console.error("Failed to fetch calendar highlights:", err)
       }
     }
     fetchHighlights()
-  }, [])
+  }, [calendarMonth])
 
   useEffect(() => {
     async function fetchLogs() {
@@ -213,6 +217,9 @@ export default function DashboardPage() {
                       <Calendar
                         onChange={setSelectedDate}
                         value={selectedDate}
+                        onActiveStartDateChange={({ activeStartDate }) =>
+                          setCalendarMonth(monthKey(activeStartDate))
+                        }
                         className="gymbro-calendar"
                         tileContent={({ date }) => {
                           const key = date.toISOString().split("T")[0]